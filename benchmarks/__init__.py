@@ -0,0 +1,8 @@
+'''
+benchmarks/__init__.py
+
+Benchmarks for the vdf module, run with: python -m benchmarks
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
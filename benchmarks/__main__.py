@@ -0,0 +1,224 @@
+'''
+benchmarks/__main__.py
+
+Measures how fast the vdf module reads and writes, and how much memory it takes
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import argparse
+import collections
+import json
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+import vdf
+from benchmarks import corpus
+from steam_library_setup.trace import countKeys
+
+REPEAT = 7
+# Slower (or bigger) than the baseline by more than this counts as a regression. Timings
+# move by 10-20% between runs on a busy machine, so it's more than that.
+THRESHOLD = 0.25
+
+Benchmark = collections.namedtuple("Benchmark", ("name", "run", "size", "keys"))
+
+Result = collections.namedtuple("Result", ("name", "seconds", "median", "mb_per_s", "keys_per_s", "peak"))
+
+
+def makeBenchmarks(scale=1):
+    '''
+    Returns a list of Benchmark. run takes no arguments, size is the number
+    of bytes it reads or writes, and keys the number of keys.
+    '''
+    benchmarks = []
+
+    documents = [
+        ('libraryfolders', corpus.libraryFolders(10, 1000 * scale)),
+        ('deep', corpus.deepNesting(200, 20 * scale)),
+        ('multiline', corpus.multilineStrings(200 * scale, 50, 80)),
+        ('escaped', corpus.escapedStrings(2000 * scale, 100)),
+    ]
+    for name, obj in documents:
+        text = vdf.dumps(obj, pretty=True)
+        size = len(text.encode('utf-8'))
+        keys = countKeys(obj)
+        benchmarks.append(Benchmark('text.loads.' + name, lambda text=text: vdf.loads(text), size, keys))
+        benchmarks.append(Benchmark('text.dumps.' + name, lambda obj=obj: vdf.dumps(obj, pretty=True), size, keys))
+
+    text, pairs = corpus.duplicateKeys(20000 * scale, 1000)
+    distinct = list(collections.OrderedDict.fromkeys(key for key, _ in pairs))
+
+    def insert():
+        d = vdf.VDFDict()
+        for key, value in pairs:
+            d[key] = value
+        return d
+
+    def removeAll():
+        d = insert()
+        for key in distinct:
+            d.remove_all_for(key)
+
+    many = [('key', i) for i in range(20000 * scale)]
+
+    def deleteFirst():
+        # Deleting (0, key) over and over from a key with many duplicates
+        d = vdf.VDFDict(many)
+        for _ in many:
+            del d[(0, 'key')]
+
+    filled = insert()
+    size = len(text.encode('utf-8'))
+    benchmarks.extend([
+        Benchmark('vdfdict.loads', lambda: vdf.loads(text, mapper=vdf.VDFDict), size, len(pairs)),
+        Benchmark('vdfdict.insert', insert, 0, len(pairs)),
+        Benchmark('vdfdict.get_all_for', lambda: [filled.get_all_for(key) for key in distinct], 0, len(pairs)),
+        Benchmark('vdfdict.remove_all_for', removeAll, 0, len(pairs)),
+        Benchmark('vdfdict.delete_first', deleteFirst, 0, len(many)),
+    ])
+
+    blob = corpus.binaryBlob(200 * scale, 50, 4096)
+    keys = countKeys(blob)
+    binary = vdf.binary_dumps(blob)
+    vbkv = vdf.vbkv_dumps(blob)
+    benchmarks.extend([
+        Benchmark('binary.loads', lambda: vdf.binary_loads(binary), len(binary), keys),
+        Benchmark('binary.loads.vdfdict', lambda: vdf.binary_loads(binary, mapper=vdf.VDFDict), len(binary), keys),
+        Benchmark('binary.dumps', lambda: vdf.binary_dumps(blob), len(binary), keys),
+        Benchmark('vbkv.loads', lambda: vdf.vbkv_loads(vbkv), len(vbkv), keys),
+        Benchmark('vbkv.dumps', lambda: vdf.vbkv_dumps(blob), len(vbkv), keys),
+    ])
+
+    return benchmarks
+
+
+def peakMemory(run):
+    # Most memory allocated at once while running, above what was there before
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before
+
+
+def runBenchmark(benchmark, repeat=REPEAT):
+    '''
+    Times benchmark over repeat rounds of as many calls as fit in about 0.2
+    seconds, keeping the best and the median round, and measures its peak
+    memory in a separate call, since tracing slows everything down.
+    Throughput is worked out from the best round. Returns a Result.
+    '''
+    timer = timeit.Timer(benchmark.run)
+    number, _ = timer.autorange()
+    rounds = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    seconds = min(rounds)
+
+    return Result(benchmark.name, seconds, statistics.median(rounds),
+                  benchmark.size / seconds / 1e6 if benchmark.size else None,
+                  benchmark.keys / seconds, peakMemory(benchmark.run))
+
+
+def compareResults(results, baseline, threshold=THRESHOLD):
+    '''
+    Compares results with the ones in baseline (as saved by saveResults()),
+    best round against best round, which is the least noisy. Returns a list
+    of (name, time change, memory change, regressed), where the changes are
+    fractions (0.1 is 10% more). Benchmarks that aren't in the baseline are
+    left out.
+    '''
+    compared = []
+    for result in results:
+        old = baseline['results'].get(result.name)
+        if old is None:
+            continue
+        time_change = result.seconds / old['seconds'] - 1
+        memory_change = result.peak / old['peak'] - 1 if old['peak'] else 0.0
+        compared.append((result.name, time_change, memory_change,
+                         time_change > threshold or memory_change > threshold))
+    return compared
+
+
+def saveResults(path, results, scale):
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+        'results': collections.OrderedDict((result.name, result._asdict()) for result in results),
+    }
+    with open(path, 'w') as f_out:
+        json.dump(data, f_out, indent=2)
+        f_out.write('\n')
+
+
+def formatResult(result, comparison=None):
+    line = "{:<26} {:>10.3f} ms {:>9} MB/s {:>12,.0f} keys/s {:>10,} KiB peak".format(
+        result.name, result.seconds * 1000,
+        "{:.1f}".format(result.mb_per_s) if result.mb_per_s is not None else "-",
+        result.keys_per_s, result.peak // 1024)
+    if comparison is not None:
+        _, time_change, memory_change, regressed = comparison
+        line += "  time {:+.1%} memory {:+.1%}{}".format(time_change, memory_change,
+                                                        "  REGRESSION" if regressed else "")
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Benchmark the vdf module.")
+    parser.add_argument("-k", "--filter", default='', metavar="TEXT",
+                        help="only run the benchmarks with TEXT in their name")
+    parser.add_argument("--scale", type=int, default=1,
+                        help="make the documents this many times bigger (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help="rounds to time each benchmark for (default: %(default)s)")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="compare with the results saved in FILE by --save, on the same machine")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="fraction slower or bigger that counts as a regression (default: %(default)s)")
+    parser.add_argument("--save", metavar="FILE",
+                        help="save the results to FILE, to be used as a baseline")
+    parser.add_argument("--fail-on-regression", action='store_true',
+                        help="exit with 1 if anything regressed against the baseline")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f_in:
+            baseline = json.load(f_in)
+        if baseline.get('scale') != args.scale:
+            print("The baseline was run with --scale {}, not comparing".format(baseline.get('scale')))
+            baseline = None
+
+    results = []
+    regressed = False
+    for benchmark in makeBenchmarks(args.scale):
+        if args.filter not in benchmark.name:
+            continue
+
+        result = runBenchmark(benchmark, args.repeat)
+        results.append(result)
+
+        comparison = None
+        if baseline is not None:
+            compared = compareResults([result], baseline, args.threshold)
+            if compared:
+                comparison = compared[0]
+                regressed = regressed or comparison[3]
+        print(formatResult(result, comparison))
+        sys.stdout.flush()
+
+    if args.save:
+        saveResults(args.save, results, args.scale)
+
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+'''
+benchmarks/corpus.py
+
+Makes up VDF documents that look like the ones Steam writes, for the benchmarks
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import random
+import string
+import vdf
+
+# Everything is generated from this seed, so every run measures the same documents
+SEED = 1234
+
+
+def _word(rng, length):
+    return ''.join(rng.choice(string.ascii_letters) for _ in range(length))
+
+
+def libraryFolders(libraries, apps):
+    '''
+    libraryfolders.vdf with the given number of libraries, each with apps
+    installed apps.
+    '''
+    rng = random.Random(SEED)
+    folders = {}
+    for i in range(libraries):
+        folders[str(i)] = {
+            'path': 'D:\\SteamLibrary{}'.format(i),
+            'label': '',
+            'contentid': str(rng.randint(1, 10000000000)),
+            'totalsize': str(rng.randint(0, 1 << 42)),
+            'update_clean_bytes_tally': str(rng.randint(0, 1 << 32)),
+            'time_last_update_corruption': '0',
+            'apps': dict((str(rng.randint(10, 2000000)), str(rng.randint(0, 1 << 36))) for _ in range(apps)),
+        }
+    return {'libraryfolders': folders}
+
+
+def deepNesting(depth, width):
+    '''
+    Blocks nested depth levels deep, with width keys next to each block.
+    '''
+    rng = random.Random(SEED)
+    root = node = {}
+    for level in range(depth):
+        for i in range(width):
+            node['key{}'.format(i)] = _word(rng, 8)
+        child = {}
+        node['level{}'.format(level)] = child
+        node = child
+    return {'root': root}
+
+
+def multilineStrings(count, lines, line_length):
+    '''
+    count values of lines lines each, like the descriptions in app manifests.
+    '''
+    rng = random.Random(SEED)
+    return {'strings': dict(('text{}'.format(i), '\n'.join(_word(rng, line_length) for _ in range(lines)))
+                            for i in range(count))}
+
+
+def escapedStrings(count, length):
+    '''
+    count values made mostly of characters that have to be escaped.
+    '''
+    rng = random.Random(SEED)
+    alphabet = '\\"\n\t\rab'
+    return {'escaped': dict(('key"{}\\'.format(i), ''.join(rng.choice(alphabet) for _ in range(length)))
+                            for i in range(count))}
+
+
+def binaryBlob(apps, keys, blob_size):
+    '''
+    An appinfo.vdf style document for the binary formats: apps entries of
+    keys typed values each, plus one string of blob_size bytes per app.
+    '''
+    rng = random.Random(SEED)
+    data = {}
+    for appid in range(apps):
+        app = {
+            'appid': appid,
+            'change_number': vdf.UINT_64(rng.getrandbits(64)),
+            'rating': rng.random(),
+            'color': vdf.COLOR(rng.getrandbits(31)),
+            'blob': _word(rng, blob_size),
+            'config': dict(('key{}'.format(i), rng.randint(-(1 << 31), (1 << 31) - 1) if i % 2 else _word(rng, 12))
+                           for i in range(keys)),
+        }
+        data[str(appid)] = app
+    return {'appinfo': data}
+
+
+def duplicateKeys(keys, distinct):
+    '''
+    Text with keys entries using only distinct different keys, for parsing
+    into a VDFDict, and the same entries as a list of (key, value).
+    '''
+    rng = random.Random(SEED)
+    pairs = [('key{}'.format(rng.randrange(distinct)), _word(rng, 10)) for _ in range(keys)]
+    lines = ['"duplicates"', '{']
+    lines.extend('\t"{}"\t\t"{}"'.format(key, value) for key, value in pairs)
+    lines.append('}')
+    return '\n'.join(lines) + '\n', pairs
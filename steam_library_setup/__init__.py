@@ -0,0 +1,11 @@
+'''
+steam_library_setup
+
+Library folder handling for Steam, shared by the GUI and the command line
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+from steam_library_setup.core import LibrarySetup, LibrarySetupError, findSteamExe
+from steam_library_setup.library_list import LibraryListModel
+from steam_library_setup.loader import LibraryLoader
@@ -0,0 +1,5 @@
+import sys
+
+from steam_library_setup.cli import main
+
+sys.exit(main())
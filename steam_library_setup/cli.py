@@ -0,0 +1,275 @@
+'''
+steam_library_setup/cli.py
+
+Sets up the library folders of many Steam installs at once
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import argparse
+import collections
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from steam_library_setup import trace
+from steam_library_setup.core import LibrarySetup, LibrarySetupError
+from steam_library_setup.daemon import LibraryDaemon, POLL_INTERVAL
+from steam_library_setup.manifest_cache import ManifestCache
+from steam_library_setup.manifests import MANIFEST_WORKERS
+from steam_library_setup.probe import PROBE_TIMEOUT
+
+InstallReport = collections.namedtuple("InstallReport", (
+    "root", "added", "removed", "warnings", "sizes", "duplicates", "moves", "error"))
+
+
+def steamExePath(root):
+    # A Steam install directory stands in for the steam.exe inside it
+    if os.path.isdir(root):
+        return os.path.join(root, "steam.exe")
+    return root
+
+
+def reconcileInstall(root, libraries, options):
+    '''
+    Makes the library folders of the Steam install at root match libraries
+    (or leaves them as they are if libraries is None),
+    as set by options (the parsed command line). This runs in a worker
+    process, so it returns an InstallReport made of plain values.
+
+    warnings is a list of (path, reason) for libraries and manifests that
+    couldn't be read. sizes is a list of (library, measured, expected,
+    complete, apps), where apps is a list of (appid, name, measured,
+    expected) and expected is what the app manifests say. duplicates is a
+    list of DuplicateApp. moves is a list of MoveResult, or of (appid,
+    destination) for a dry run.
+    '''
+    sizes = []
+    duplicates = []
+    moves = []
+    try:
+        rng = random.Random(options.seed) if options.seed is not None else None
+        setup = LibrarySetup(steamExePath(root), confirm=lambda title, message: options.yes, rng=rng,
+                             probe_timeout=options.probe_timeout)
+        if libraries is None:
+            # Without a list of libraries, keep the ones Steam already has
+            libraries = setup.libraryPaths()[1 if setup.steam_library is not None else 0:]
+        added, removed = setup.applyLibraries(libraries, options.resolve_paths)
+        setup.finalizeLibraryInfo()
+        warnings = [(probe.path, probe.error) for probe in setup.unreachableLibraries()]
+
+        scan = options.scan_apps or options.measure_sizes or options.find_duplicates or options.moves
+
+        # Finished before the scan, so it finds the apps where they ended up
+        if scan or options.resume_moves:
+            for journal in setup.pendingMoves():
+                if options.resume_moves and not options.dry_run:
+                    moves.append(setup.resumeMove(journal, verify=options.verify_moves))
+                else:
+                    warnings.append((journal, "unfinished move, --resume-moves finishes it"))
+
+        if scan:
+            # Installs set up in parallel share the cache file, save() merges with what the others saved
+            cache = ManifestCache.load(options.manifest_cache) if options.manifest_cache else None
+            warnings.extend(setup.scanLibraryApps(options.scan_workers, cache=cache))
+            if cache is not None:
+                cache.save()
+
+        if options.measure_sizes:
+            for library_size in setup.measureLibraryApps(budget=options.size_budget, write_back=options.write_sizes):
+                manifests = dict((app.appid, app) for app in setup.manifests[library_size.path])
+                apps = []
+                for app in library_size.apps:
+                    if app.error is not None:
+                        warnings.append((app.path, app.error))
+                    apps.append((app.appid, manifests[app.appid].name, app.size,
+                                 int(manifests[app.appid].size_on_disk or 0)))
+                sizes.append((library_size.path, library_size.size, sum(app[3] for app in apps),
+                              library_size.complete, apps))
+
+        if options.find_duplicates:
+            duplicates = setup.compareDuplicateApps()
+
+        for appid, destination in options.moves:
+            if options.dry_run:
+                moves.append((appid, destination))
+            else:
+                moves.append(setup.moveApp(appid, destination, verify=options.verify_moves))
+
+        if not options.dry_run:
+            setup.writeLibraryInfo()
+    except (LibrarySetupError, OSError, SyntaxError) as e:
+        return InstallReport(root, [], [], [], [], [], [], str(e))
+
+    return InstallReport(root, added, removed, warnings, sizes, duplicates, moves, None)
+
+
+def formatSize(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return "{:.1f} {}".format(size, unit)
+        size /= 1024.0
+    return "{:.1f} TB".format(size)
+
+
+def formatReport(report, dry_run=False, verbose=False):
+    if report.error is not None:
+        return "{}: error: {}".format(report.root, report.error)
+
+    lines = ["{}: {} added, {} removed{}".format(
+        report.root, len(report.added), len(report.removed), " (dry run)" if dry_run else "")]
+    lines.extend("  + {}".format(path) for path in report.added)
+    lines.extend("  - {}".format(path) for path in report.removed)
+    lines.extend("  ! {}: {}".format(path, reason) for path, reason in report.warnings)
+
+    for library, measured, expected, complete, apps in report.sizes:
+        lines.append("  = {}: {}{} in {} apps, manifests say {}".format(
+            library, formatSize(measured), "" if complete else " or more (stopped early)", len(apps),
+            formatSize(expected)))
+        if verbose:
+            lines.extend("      {} {}: {}, manifest says {}".format(
+                appid, name, formatSize(app_measured), formatSize(app_expected))
+                for appid, name, app_measured, app_expected in apps)
+
+    for duplicate in report.duplicates:
+        differences = []
+        if duplicate.size_mismatch:
+            differences.append("{} files differ in size".format(len(duplicate.size_mismatch)))
+        if duplicate.content_mismatch:
+            differences.append("{} files differ in content".format(len(duplicate.content_mismatch)))
+        lines.append("  * {} {}: {} copies, {}".format(
+            duplicate.appid, duplicate.copies[0].manifest.name, len(duplicate.copies),
+            "identical" if duplicate.identical else ", ".join(differences) or "different files"))
+        for copy in duplicate.copies:
+            lines.append("      {}: StateFlags {}, {} in {} files{}".format(
+                copy.library, copy.manifest.state_flags, formatSize(copy.size), copy.files,
+                ", {} missing".format(len(copy.missing)) if copy.missing else ""))
+
+    for move in report.moves:
+        if dry_run:
+            lines.append("  > {} to {}".format(*move))
+        else:
+            lines.append("  > {} from {} to {}: {} {} files, {}".format(
+                move.appid, move.source, move.destination, "renamed" if move.renamed else "copied",
+                move.files, formatSize(move.size)))
+
+    return "\n".join(lines)
+
+
+def readLibraryList(path):
+    with open(path, 'r') as f_in:
+        return [line.strip() for line in f_in if line.strip()]
+
+
+def parseMove(value):
+    # APPID:LIBRARY, where the library path may have colons of its own
+    appid, sep, destination = value.partition(':')
+    if not sep or not appid.isdigit() or not destination:
+        raise argparse.ArgumentTypeError("expected APPID:LIBRARY, got {!r}".format(value))
+    return appid, destination
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="steam_library_setup",
+        description="Set the library folders of one or more Steam installs. The Steam "
+                    "library of each install is always kept.")
+    parser.add_argument("roots", nargs='+', metavar="STEAM",
+                        help="Steam install directory, or the path to its steam.exe")
+    parser.add_argument("-l", "--library", action='append', default=[], dest='libraries',
+                        help="library folder that should be set up, can be repeated (without -l or -f, "
+                             "the library folders are kept as they are)")
+    parser.add_argument("-f", "--libraries-from", metavar="FILE",
+                        help="read library folders from FILE, one per line")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="number of installs to set up in parallel (default: one per CPU)")
+    parser.add_argument("-n", "--dry-run", action='store_true',
+                        help="report the changes without writing anything")
+    parser.add_argument("--resolve-paths", action='store_true',
+                        help="resolve links before comparing library folders")
+    parser.add_argument("--probe-timeout", type=float, default=PROBE_TIMEOUT, metavar="SECONDS",
+                        help="give up on a library folder that doesn't answer in time (default: %(default)s)")
+    parser.add_argument("--scan-apps", action='store_true',
+                        help="fill in the installed apps of each library from its app manifests")
+    parser.add_argument("--scan-workers", type=int, default=MANIFEST_WORKERS, metavar="N",
+                        help="number of threads reading app manifests")
+    parser.add_argument("--manifest-cache", metavar="FILE",
+                        help="keep what was read from app manifests in FILE, so the next scan only reads what changed")
+    parser.add_argument("--measure-sizes", action='store_true',
+                        help="measure the install folders of the apps on disk (implies --scan-apps)")
+    parser.add_argument("--size-budget", type=int, default=None, metavar="BYTES",
+                        help="stop measuring once this much has been counted")
+    parser.add_argument("--write-sizes", action='store_true',
+                        help="write the measured sizes to the apps of each library (implies --measure-sizes)")
+    parser.add_argument("--find-duplicates", action='store_true',
+                        help="find apps installed in more than one library and compare the copies (implies --scan-apps)")
+    parser.add_argument("--move", action='append', default=[], dest='moves', type=parseMove, metavar="APPID:LIBRARY",
+                        help="move an installed app to another library folder, can be repeated")
+    parser.add_argument("--resume-moves", action='store_true',
+                        help="finish the moves between drives that were interrupted")
+    parser.add_argument("--no-verify", action='store_false', dest='verify_moves',
+                        help="don't compare the copied files of a move to the originals")
+    parser.add_argument("-v", "--verbose", action='store_true',
+                        help="list every app with its measured size")
+    parser.add_argument("--serve", metavar="SOCKET",
+                        help="keep watching the library folders of one install and answer queries on a Unix socket")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, metavar="SECONDS",
+                        help="how often --serve looks for changes without inotify (default: %(default)s)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write how long each step took, and what it read and wrote, to FILE as JSON "
+                             "(or set {})".format(trace.TRACE_ENV))
+    parser.add_argument("--profile", action='append', default=[], choices=trace.PROFILERS,
+                        help="add a profile to the trace, can be repeated (or set {})".format(trace.PROFILE_ENV))
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for new ContentIDs, to get the same ones every run")
+    parser.add_argument("-y", "--yes", action='store_true',
+                        help="create missing steamapps folders, and write even if a backup can't be made")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        if len(args.roots) != 1:
+            parser.error("--serve takes exactly one Steam install")
+        try:
+            daemon = LibraryDaemon(steamExePath(args.roots[0]), args.poll_interval)
+            daemon.serve(args.serve)
+        except LibrarySetupError as e:
+            print("{}: error: {}".format(args.roots[0], e))
+            return 1
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    libraries = None
+    if args.libraries or args.libraries_from:
+        libraries = list(args.libraries)
+        if args.libraries_from:
+            libraries.extend(readLibraryList(args.libraries_from))
+
+    args.measure_sizes = args.measure_sizes or args.write_sizes
+
+    if args.trace or args.profile:
+        tracer = trace.startTracing(args.trace or trace.TRACE_FILE, args.profile)
+    else:
+        tracer = trace.startTracingFromEnvironment()
+
+    # The trace only sees this process, so installs are done one at a time while tracing
+    try:
+        if len(args.roots) == 1 or args.jobs == 1 or tracer is not None:
+            results = []
+            for root in args.roots:
+                with trace.span('reconcileInstall', root=root):
+                    results.append(reconcileInstall(root, libraries, args))
+        else:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = list(executor.map(reconcileInstall, args.roots,
+                                            [libraries] * len(args.roots), [args] * len(args.roots)))
+    finally:
+        # Written even after a crash or Ctrl+C, when it's wanted most
+        trace.stopTracing()
+
+    failed = False
+    for report in results:
+        print(formatReport(report, args.dry_run, args.verbose))
+        failed = failed or report.error is not None
+
+    return 1 if failed else 0
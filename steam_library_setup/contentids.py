@@ -0,0 +1,86 @@
+'''
+steam_library_setup/contentids.py
+
+Keeps track of the ContentIDs in use and hands out new ones
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import random
+import vdf
+
+from steam_library_setup import trace
+from steam_library_setup.writer import ENCODING, ENCODING_ERRORS
+
+
+def readLibraryFolderInfo(library_path):
+    '''
+    Returns the contents of the libraryfolder.vdf in library_path (the block
+    under its root key), or None if there isn't one.
+    '''
+    library_vdf_path = os.path.join(library_path, 'libraryfolder.vdf')
+    trace.count('files_stated')
+    if not os.path.exists(library_vdf_path):
+        return None
+
+    with open(library_vdf_path, 'r', encoding=ENCODING, errors=ENCODING_ERRORS) as f_in:
+        trace.count('bytes_read', os.fstat(f_in.fileno()).st_size)
+        info = vdf.load(f_in)
+    if trace.enabled():
+        trace.count('vdf_keys', trace.countKeys(info))
+
+    if not info:
+        return None
+
+    root = list(info.keys())[0]
+    return info[root] if isinstance(info[root], dict) else None
+
+
+class ContentIDRegistry(object):
+    '''
+    The set of ContentIDs known to be in use. IDs are kept as strings, the
+    same as in the .vdf files. Empty IDs are ignored.
+
+    rng is the random.Random used to make new IDs. Pass one with a seed to
+    get the same IDs every run.
+    '''
+
+    MIN_ID = 1
+    MAX_ID = 10000000000
+
+    def __init__(self, contentids=(), rng=None):
+        self.contentids = set()
+        self.rng = rng if rng is not None else random.Random()
+        self.update(contentids)
+
+    def __contains__(self, contentid):
+        return str(contentid) in self.contentids
+
+    def __len__(self):
+        return len(self.contentids)
+
+    def add(self, contentid):
+        if contentid is not None and contentid != '':
+            self.contentids.add(str(contentid))
+
+    def update(self, contentids):
+        for contentid in contentids:
+            self.add(contentid)
+
+    def allocate(self, count=1):
+        '''
+        Returns a list of count new random ContentIDs, which are registered as
+        used right away.
+        '''
+        if count > self.MAX_ID - self.MIN_ID + 1 - len(self.contentids):
+            raise ValueError("Not enough free ContentIDs left")
+
+        allocated = []
+        while len(allocated) < count:
+            candidate = str(self.rng.randint(self.MIN_ID, self.MAX_ID))
+            if candidate not in self.contentids:
+                self.contentids.add(candidate)
+                allocated.append(candidate)
+
+        return allocated
@@ -0,0 +1,462 @@
+'''
+steam_library_setup/core.py
+
+Library folder handling for Steam, without any GUI
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import vdf
+
+from steam_library_setup import trace
+from steam_library_setup.contentids import ContentIDRegistry
+from steam_library_setup.duplicates import compareDuplicateApps, HASH_WORKERS, HASH_CHUNK_SIZE
+from steam_library_setup.manifests import scanManifests, MANIFEST_WORKERS
+from steam_library_setup.mover import moveApp, pendingMoves, resumeMove, MOVE_WORKERS
+from steam_library_setup.sizes import measureLibraries, SIZE_WORKERS
+from steam_library_setup.probe import probeLibraries, PROBE_TIMEOUT, PROBE_WORKERS
+from steam_library_setup.writer import serializeVdf, fileMatches, backupFile, replaceFile, ENCODING, ENCODING_ERRORS
+from steam_library_setup.reconcile import isLibraryKey, normalizeLibraryPath, reconcileLibraries, allocateLibraryKeys
+
+
+class LibrarySetupError(ValueError):
+    pass
+
+
+def newLibraryEntry(path):
+    return {
+        'path': path,
+        'label': '',
+        'contentid': '',
+        'totalsize': '0',
+        'mounted': '1',
+        'apps': dict(),
+    }
+
+
+@trace.traced('findSteamExe')
+def findSteamExe():
+    # Try to read the registry for the location of Steam
+    try:
+        import winreg
+    except ImportError:
+        return ''
+
+    try:
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Software\\Valve\\Steam") as key:
+            value = winreg.QueryValueEx(key, "SteamExe")
+            return value[0].replace("/", "\\")
+    except OSError:
+        return ''
+
+
+class LibrarySetup(object):
+    '''
+    The library folders of one Steam install.
+
+    steam_path is the path to steam.exe. Only its directory is used, so the
+    executable doesn't need to exist (e.g. for a mounted image).
+
+    confirm is called as confirm(title, message) before doing something the
+    user may not want, and returns True to go ahead. Without it, the answer
+    is always no.
+
+    rng is passed on to the ContentIDRegistry, which makes the new ContentIDs.
+    probe_timeout and probe_workers are passed on to probeLibraries().
+    '''
+
+    def __init__(self, steam_path, confirm=None, rng=None, probe_timeout=PROBE_TIMEOUT, probe_workers=PROBE_WORKERS):
+        if not steam_path:
+            raise LibrarySetupError("Could not find Steam.exe")
+
+        self.steam_path = steam_path
+        self.confirm = confirm if confirm is not None else (lambda title, message: False)
+
+        steam_dir = os.path.dirname(self.steam_path)
+        self.config_library_vdf = os.path.join(steam_dir, "config", "libraryfolders.vdf")
+        self.steamapps_library_vdf = os.path.join(steam_dir, "steamapps", "libraryfolders.vdf")
+
+        # Read library info
+        self.new_config = {}
+        self.contentids = ContentIDRegistry(rng=rng)
+        self.probe_timeout = probe_timeout
+        self.probe_workers = probe_workers
+        self.probes = {}
+        self.manifests = {}
+        self.createLibraryInfo()
+        self.parseLibraryInfo()
+
+        # One of the library folders should be the Steam path
+        # This can't really be deleted or modified so remove it for now
+        # and add it back in later
+        self.steam_library = None
+        self.steam_library_key = self.findSteamLibraryKey()
+        self.steam_library_position = None
+
+        if self.steam_library_key is not None:
+            self.steam_library_position = list(self.new_config['libraryfolders']).index(self.steam_library_key)
+            self.steam_library = self.new_config['libraryfolders'].pop(self.steam_library_key)
+
+    def findSteamLibraryKey(self):
+        libraries = self.new_config['libraryfolders']
+        steam_dir = normalizeLibraryPath(os.path.dirname(self.steam_path))
+
+        for key in libraries:
+            if isLibraryKey(key) and normalizeLibraryPath(libraries[key]['path']) == steam_dir:
+                return key
+
+        # Steam always keeps its own install as the first library. The path
+        # won't match when the install is looked at from somewhere else.
+        if '0' in libraries:
+            return '0'
+
+        return None
+
+    def libraryPaths(self):
+        # The Steam library comes first, followed by the other library folders
+        paths = []
+        if self.steam_library is not None:
+            paths.append(self.steam_library['path'])
+
+        for key in self.new_config['libraryfolders']:
+            if isLibraryKey(key):
+                paths.append(self.new_config['libraryfolders'][key]['path'].replace("\\\\", "\\"))
+
+        return paths
+
+    def createLibraryInfo(self):
+        self.new_config = dict()
+        self.new_config['libraryfolders'] = dict()
+
+    @trace.traced('parseLibraryInfo')
+    def parseLibraryInfo(self):
+        for f_path in [self.config_library_vdf, self.steamapps_library_vdf]:
+            trace.count('files_stated')
+            if os.path.exists(f_path):
+                with open(f_path, 'r', encoding=ENCODING, errors=ENCODING_ERRORS) as f_in:
+                    trace.count('bytes_read', os.fstat(f_in.fileno()).st_size)
+                    info = vdf.load(f_in)
+                break
+        else:
+            raise LibrarySetupError("Could not find a libraryfolders.vdf file.")
+
+        if trace.enabled():
+            trace.count('vdf_keys', trace.countKeys(info))
+
+        root = list(info.keys())[0]
+        for key in info[root]:
+            if isLibraryKey(key):
+                # If the value is a dict, must be new format
+                if isinstance(info[root][key], dict):
+                    self.new_config['libraryfolders'][key] = info[root][key]
+                    self.new_config['libraryfolders'][key]['mounted'] = '1'
+                    self.contentids.add(self.new_config['libraryfolders'][key]['contentid'])
+
+                # Old format is just a string
+                elif isinstance(info[root][key], str):
+                    self.new_config['libraryfolders'][key] = newLibraryEntry(info[root][key])
+
+                # WTF
+                else:
+                    raise LibrarySetupError("Unknown file format")
+
+            else:
+                if key.lower() == 'contentstatsid':
+                    self.contentids.add(info[root][key])
+
+                self.new_config['libraryfolders'][key] = info[root][key]
+
+    @trace.traced('applyLibraries')
+    def applyLibraries(self, listed_libraries, resolve=False):
+        '''
+        Makes the library folders match listed_libraries, which doesn't include
+        the Steam library. Paths are compared with normalizeLibraryPath(), see
+        there for resolve. Returns the lists of added and removed paths.
+        '''
+        libraries = self.new_config['libraryfolders']
+
+        # Add the original Steam library in if it's present (and it should be!)
+        pinned = ()
+        if self.steam_library_key is not None:
+            # Make sure we're not killing something that already exists
+            if libraries.get(self.steam_library_key) is not None:
+                raise LibrarySetupError("Expected key {} to be unused!".format(self.steam_library_key))
+
+            # Put it back where it was, so an unchanged setup writes the same file
+            items = list(libraries.items())
+            items.insert(self.steam_library_position, (self.steam_library_key, self.steam_library))
+            libraries.clear()
+            libraries.update(items)
+            pinned = (self.steam_library_key,)
+
+        plan = reconcileLibraries(libraries, listed_libraries, pinned, resolve)
+
+        removed = [libraries.pop(key)['path'] for key in plan.remove]
+
+        for key, library in zip(allocateLibraryKeys(libraries, len(plan.add)), plan.add):
+            libraries[key] = newLibraryEntry(library)
+
+        return plan.add, removed
+
+    @trace.traced('probeLibraryInfo')
+    def probeLibraryInfo(self):
+        # Check all library folders at once, and mark the ones that can't be reached
+        libraries = self.new_config['libraryfolders']
+        keys = [key for key in libraries if isLibraryKey(key)]
+
+        self.probes = probeLibraries([libraries[key]['path'] for key in keys],
+                                     self.probe_timeout, self.probe_workers)
+
+        for key in keys:
+            libraries[key]['mounted'] = '1' if self.probes[libraries[key]['path']].reachable else '0'
+
+    def unreachableLibraries(self):
+        return [probe for probe in self.probes.values() if not probe.reachable]
+
+    @trace.traced('finalizeLibraryInfo')
+    def finalizeLibraryInfo(self):
+        # To "finalize" the library info, we need to fill out any missing entries.
+        self.probeLibraryInfo()
+
+        libraries = self.new_config['libraryfolders']
+        missing = []
+
+        for key in libraries:
+            if isLibraryKey(key):
+                # Every libraryfolder.vdf is read, so their ContentIDs are never handed out again
+                probe = self.probes[libraries[key]['path']]
+                self.contentids.add(probe.contentid)
+
+                if libraries[key]['contentid'] == '':
+                    if probe.contentid is not None:
+                        libraries[key]['contentid'] = probe.contentid
+                    if probe.label is not None:
+                        libraries[key]['label'] = probe.label
+
+                # Check again as there might not have been a libraryfolder.vdf or it didn't have a valid ContentID
+                if libraries[key]['contentid'] == '':
+                    missing.append(key)
+
+        # Create random unused numbers and use those
+        for key, contentid in zip(missing, self.contentids.allocate(len(missing))):
+            libraries[key]['contentid'] = contentid
+
+    @trace.traced('scanLibraryApps')
+    def scanLibraryApps(self, max_workers=MANIFEST_WORKERS, progress=None, use_processes=False, cache=None):
+        '''
+        Fills in apps (appid to SizeOnDisk) of every reachable library from its
+        app manifests, and totalsize from the size of its drive, the same as
+        Steam does. See scanManifests() for the arguments. Returns a list of
+        (path, reason) for the manifests that couldn't be read.
+        '''
+        if not self.probes:
+            self.probeLibraryInfo()
+
+        libraries = self.new_config['libraryfolders']
+        keys = [key for key in libraries
+                if isLibraryKey(key) and self.probes[libraries[key]['path']].reachable]
+
+        scan = scanManifests([libraries[key]['path'] for key in keys], max_workers, progress, use_processes, cache)
+
+        for key in keys:
+            library = libraries[key]
+            library['apps'] = dict((app.appid, app.size_on_disk) for app in scan.manifests[library['path']])
+            library['totalsize'] = str(self.probes[library['path']].total)
+
+        self.manifests = scan.manifests
+        return scan.errors
+
+    @trace.traced('measureLibraryApps')
+    def measureLibraryApps(self, max_workers=SIZE_WORKERS, budget=None, progress=None, write_back=False):
+        '''
+        Measures the install folders of the apps found by scanLibraryApps(),
+        which is run first if needed. See measureLibraries() for the arguments.
+        With write_back, the SizeOnDisk of every app that was measured
+        completely is replaced in apps. Returns a list of LibrarySize.
+        '''
+        if not self.manifests:
+            self.scanLibraryApps()
+
+        sizes = measureLibraries(self.manifests, max_workers, budget, progress)
+
+        if write_back:
+            libraries = self.new_config['libraryfolders']
+            by_path = dict((libraries[key]['path'], libraries[key]) for key in libraries if isLibraryKey(key))
+            for library_size in sizes:
+                apps = by_path[library_size.path]['apps']
+                for app in library_size.apps:
+                    if app.complete:
+                        apps[app.appid] = str(app.size)
+
+        return sizes
+
+    @trace.traced('compareDuplicateApps')
+    def compareDuplicateApps(self, max_workers=HASH_WORKERS, chunk_size=HASH_CHUNK_SIZE):
+        '''
+        Finds the apps installed in more than one library, from the app
+        manifests found by scanLibraryApps() (which is run first if needed),
+        and compares the copies. Returns a list of DuplicateApp.
+        '''
+        if not self.manifests:
+            self.scanLibraryApps()
+
+        return compareDuplicateApps(self.manifests, max_workers, chunk_size)
+
+    @trace.traced('moveApp')
+    def moveApp(self, appid, destination, max_workers=MOVE_WORKERS, verify=True, progress=None):
+        '''
+        Moves an app found by scanLibraryApps() (which is run first if needed)
+        to the library at destination, see moveApp() in mover.py. apps in both
+        libraries is updated. Returns a MoveResult.
+        '''
+        if not self.manifests:
+            self.scanLibraryApps()
+
+        libraries = self.new_config['libraryfolders']
+        by_path = dict((normalizeLibraryPath(libraries[key]['path']), libraries[key])
+                       for key in libraries if isLibraryKey(key))
+        target = by_path.get(normalizeLibraryPath(destination))
+        if target is None:
+            raise LibrarySetupError("{} is not a library folder".format(destination))
+
+        found = [(library_path, app) for library_path, apps in self.manifests.items()
+                 for app in apps if app.appid == appid]
+        if not found:
+            raise LibrarySetupError("App {} is not installed in any library folder".format(appid))
+        source, app = found[0]
+        if normalizeLibraryPath(source) == normalizeLibraryPath(destination):
+            raise LibrarySetupError("App {} is already in {}".format(appid, destination))
+
+        try:
+            result = moveApp(app, source, target['path'], max_workers, verify, progress)
+        except OSError as e:
+            raise LibrarySetupError("Failed to move app {}: {}".format(appid, e)) from e
+
+        by_path[normalizeLibraryPath(source)].setdefault('apps', {}).pop(appid, None)
+        target.setdefault('apps', {})[appid] = app.size_on_disk
+
+        moved = app._replace(path=os.path.join(target['path'], 'steamapps', os.path.basename(app.path)))
+        self.manifests[source] = [other for other in self.manifests[source] if other is not app]
+        self.manifests.setdefault(target['path'], []).append(moved)
+
+        return result
+
+    def pendingMoves(self):
+        # Journals of the moves between drives that were interrupted, in every reachable library
+        if not self.probes:
+            self.probeLibraryInfo()
+
+        libraries = self.new_config['libraryfolders']
+        journals = []
+        for key in libraries:
+            if isLibraryKey(key) and self.probes[libraries[key]['path']].reachable:
+                journals.extend(pendingMoves(libraries[key]['path']))
+        return journals
+
+    @trace.traced('resumeMove')
+    def resumeMove(self, journal, max_workers=MOVE_WORKERS, verify=True, progress=None):
+        '''
+        Finishes a move that was interrupted, from one of the journals found
+        by pendingMoves(), see resumeMove() in mover.py. apps in both
+        libraries is updated. Returns a MoveResult.
+        '''
+        try:
+            result = resumeMove(journal, max_workers, verify, progress)
+        except (OSError, ValueError, KeyError) as e:
+            raise LibrarySetupError("Failed to resume the move in {}: {}".format(journal, e)) from e
+
+        libraries = self.new_config['libraryfolders']
+        by_path = dict((normalizeLibraryPath(libraries[key]['path']), libraries[key])
+                       for key in libraries if isLibraryKey(key))
+        source = by_path.get(normalizeLibraryPath(result.source))
+        size_on_disk = str(result.size)
+        if source is not None:
+            size_on_disk = source.setdefault('apps', {}).pop(result.appid, size_on_disk)
+        target = by_path.get(normalizeLibraryPath(result.destination))
+        if target is not None:
+            target.setdefault('apps', {})[result.appid] = size_on_disk
+
+        for library_path in list(self.manifests):
+            if normalizeLibraryPath(library_path) != normalizeLibraryPath(result.source):
+                continue
+            for app in self.manifests[library_path]:
+                if app.appid == result.appid:
+                    moved = app._replace(path=os.path.join(result.destination, 'steamapps',
+                                                           os.path.basename(app.path)))
+                    self.manifests.setdefault(result.destination, []).append(moved)
+            self.manifests[library_path] = [app for app in self.manifests[library_path]
+                                            if app.appid != result.appid]
+
+        return result
+
+    @trace.traced('writeLibraryInfo')
+    def writeLibraryInfo(self):
+        '''
+        Writes libraryfolders.vdf to both places Steam keeps it, and returns the
+        paths that were written. Files that already hold the same content are
+        not touched.
+        '''
+        # Make sure directories all exist
+        for key in self.new_config['libraryfolders']:
+            if isLibraryKey(key):
+                library = self.new_config['libraryfolders'][key]
+                folder = os.path.join(library['path'], 'steamapps')
+
+                # The probes already know, and a drive that timed out would only hang again
+                probe = self.probes.get(library['path'])
+                if probe is not None and (probe.steamapps or probe.timed_out):
+                    continue
+
+                with trace.span('checkFolder', path=folder):
+                    trace.count('files_stated')
+                    exists = os.path.exists(folder)
+
+                if not exists:
+                    if self.confirm("Create folders?", "Do you want to create the directory \"{}\"?".format(folder)):
+                        try:
+                            os.makedirs(folder, exist_ok=True)
+                        except OSError as e:
+                            raise LibrarySetupError("Error when creating directories") from e
+                        library['mounted'] = '1'
+
+        # Serialize once, and leave the files that already say the same alone
+        with trace.span('serializeVdf'):
+            data = serializeVdf(self.new_config)
+        with trace.span('compareFiles'):
+            targets = [f_path for f_path in [self.config_library_vdf, self.steamapps_library_vdf]
+                       if not fileMatches(f_path, data)]
+
+        # Create backups
+        backed_up = []
+        try:
+            for f_path in targets:
+                if os.path.exists(f_path):
+                    with trace.span('backupFile', path=f_path):
+                        backupFile(f_path, f_path + '.bak')
+                    backed_up.append(f_path)
+        except OSError:
+            if not self.confirm("Warning", "Failed to create a backup. Proceed anyways?"):
+                raise
+
+        # Write the new files
+        written = []
+        try:
+            for f_path in targets:
+                with trace.span('replaceFile', path=f_path):
+                    replaceFile(f_path, data)
+                written.append(f_path)
+        except OSError as e:
+            error = e
+        else:
+            return written
+
+        # Restore the backup of anything that was already replaced (or moved away to make the backup)
+        try:
+            for f_path in backed_up:
+                if f_path in written or not os.path.exists(f_path):
+                    os.replace(f_path + '.bak', f_path)
+        except OSError as e:
+            raise LibrarySetupError("Failed to write libraryfolders.vdf and failed to restore the backup! Sorry about that.") from e
+
+        raise LibrarySetupError("Failed to write libraryfolders.vdf. The backup was restored.") from error
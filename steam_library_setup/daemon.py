@@ -0,0 +1,485 @@
+'''
+steam_library_setup/daemon.py
+
+Keeps the library folders of a Steam install in memory and answers questions about them
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import ctypes
+import json
+import os
+import select
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+
+from steam_library_setup.core import LibrarySetup, LibrarySetupError
+from steam_library_setup.manifests import isManifestName, readManifest, scanManifests
+from steam_library_setup.reconcile import isLibraryKey
+
+POLL_INTERVAL = 2.0
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+               IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')
+
+LIBRARY_VDF = 'libraryfolders.vdf'
+
+
+class InotifyWatcher(object):
+    '''
+    Watches folders with Linux inotify. read() returns a set of (folder,
+    name) for the files that changed in the watched folders. name is None
+    when the folder itself went away, and both are None when events were
+    lost and everything has to be looked at again.
+    '''
+
+    name = 'inotify'
+
+    def __init__(self):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self.folders = {}
+        self.watches = {}
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = ctypes.CDLL(None)
+            return hasattr(libc, 'inotify_init1')
+        except OSError:
+            return False
+
+    def watch(self, folder):
+        wd = self._add_watch(self.fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), folder)
+        self.folders[wd] = folder
+        self.watches[folder] = wd
+
+    def unwatch(self, folder):
+        wd = self.watches.pop(folder, None)
+        if wd is not None:
+            self.folders.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+
+        changes = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+            offset += _EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.add((None, None))
+                continue
+
+            folder = self.folders.get(wd)
+            if folder is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                # The kernel dropped the watch (IN_IGNORED), or is about to
+                self.folders.pop(wd, None)
+                self.watches.pop(folder, None)
+                changes.add((folder, None))
+            elif name:
+                changes.add((folder, os.fsdecode(name)))
+
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher(object):
+    '''
+    Does what InotifyWatcher does by listing the watched folders every
+    time read() is called, for systems without inotify.
+    '''
+
+    name = 'polling'
+
+    def __init__(self):
+        self.listings = {}
+        self.stopped = threading.Event()
+
+    def _list(self, folder):
+        listing = {}
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                listing[entry.name] = (st.st_mtime_ns, st.st_size)
+        return listing
+
+    def watch(self, folder):
+        self.listings[folder] = self._list(folder)
+
+    def unwatch(self, folder):
+        self.listings.pop(folder, None)
+
+    def read(self, timeout):
+        if self.stopped.wait(timeout):
+            return set()
+
+        changes = set()
+        for folder, old in list(self.listings.items()):
+            try:
+                new = self._list(folder)
+            except OSError:
+                del self.listings[folder]
+                changes.add((folder, None))
+                continue
+
+            self.listings[folder] = new
+            for name in set(old).union(new):
+                if old.get(name) != new.get(name):
+                    changes.add((folder, name))
+
+        return changes
+
+    def close(self):
+        self.stopped.set()
+
+
+class LibraryDaemon(object):
+    '''
+    The library folders of the Steam install at steam_path (see
+    LibrarySetup) and the apps installed in them, kept up to date by
+    watching libraryfolders.vdf and the steamapps folder of every library.
+
+    libraryfolders.vdf is read again when it changes, and the app manifests
+    of a library only when it's new. After that, only the app manifests that
+    changed are read. Folders that can't be watched (a drive that isn't
+    there) are tried again every poll_interval seconds.
+
+    query() answers the questions the socket server is asked.
+    '''
+
+    def __init__(self, steam_path, poll_interval=POLL_INTERVAL, use_inotify=True):
+        self.steam_path = steam_path
+        self.poll_interval = poll_interval
+        self.steam_dir = os.path.dirname(steam_path)
+        self.config_folders = [os.path.join(self.steam_dir, 'config'), os.path.join(self.steam_dir, 'steamapps')]
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.libraries = collections.OrderedDict()
+        self.apps = {}
+        self.errors = {}
+        self.generation = 0
+        self.updated = None
+
+        if use_inotify and InotifyWatcher.available():
+            self.watcher = InotifyWatcher()
+        else:
+            self.watcher = PollingWatcher()
+        self.unwatched = set()
+
+        # Watch first, so a libraryfolders.vdf written while it's read isn't missed
+        for folder in self.config_folders:
+            self._watch(folder)
+        self.loadConfig()
+
+    def _steamapps(self, library_path):
+        return os.path.join(library_path, 'steamapps')
+
+    def _watch(self, folder):
+        # unwatched is read by query() on the socket threads
+        try:
+            self.watcher.watch(folder)
+        except OSError:
+            with self.lock:
+                self.unwatched.add(folder)
+            return False
+        with self.lock:
+            self.unwatched.discard(folder)
+        return True
+
+    def _readConfig(self):
+        # The library folders as Steam has them, with the Steam library back in its place
+        setup = LibrarySetup(self.steam_path)
+        items = list(setup.new_config['libraryfolders'].items())
+        # The position counts keys like contentstatsid too, so it goes in before those are left out
+        if setup.steam_library is not None:
+            items.insert(setup.steam_library_position, (setup.steam_library_key, setup.steam_library))
+
+        libraries = collections.OrderedDict()
+        for key, library in items:
+            if isLibraryKey(key):
+                libraries[library['path']] = dict(library, key=key)
+        return libraries
+
+    def loadConfig(self):
+        '''
+        Reads libraryfolders.vdf again. Libraries that were added are watched
+        and their app manifests read; the ones that were removed are dropped.
+        A file that can't be read leaves everything as it was.
+        '''
+        try:
+            libraries = self._readConfig()
+        except (LibrarySetupError, OSError, SyntaxError, UnicodeError) as e:
+            with self.lock:
+                self.errors[LIBRARY_VDF] = str(e)
+            return
+
+        added = [path for path in libraries if path not in self.libraries]
+        removed = [path for path in self.libraries if path not in libraries]
+
+        for path in removed:
+            folder = self._steamapps(path)
+            if folder not in self.config_folders:
+                self.watcher.unwatch(folder)
+            with self.lock:
+                self.unwatched.discard(folder)
+
+        # Watch first, so nothing that changes while reading is missed
+        for path in added:
+            self._watch(self._steamapps(path))
+        scan = scanManifests(added)
+
+        with self.lock:
+            self.errors.pop(LIBRARY_VDF, None)
+            for path in removed:
+                self.apps.pop(path, None)
+            for path in added:
+                self.apps[path] = dict((os.path.basename(app.path), app) for app in scan.manifests[path])
+            for path, reason in scan.errors:
+                self.errors[path] = reason
+            self.libraries = libraries
+            self._changed()
+
+    def rescanLibrary(self, path):
+        scan = scanManifests([path])
+        steamapps = self._steamapps(path)
+        with self.lock:
+            if path in self.libraries:
+                self.apps[path] = dict((os.path.basename(app.path), app) for app in scan.manifests[path])
+                # The errors found before in this library are replaced by the ones found now
+                for error_path in [error_path for error_path in self.errors
+                                   if error_path == path or os.path.dirname(error_path) == steamapps]:
+                    del self.errors[error_path]
+                for error_path, reason in scan.errors:
+                    self.errors[error_path] = reason
+                self._changed()
+
+    def updateManifest(self, path, name):
+        # One app manifest in the library at path was added, changed or removed
+        manifest_path = os.path.join(self._steamapps(path), name)
+        try:
+            app = readManifest(manifest_path)
+            error = None
+        except FileNotFoundError:
+            app, error = None, None
+        except (OSError, SyntaxError, UnicodeError) as e:
+            # Most likely caught half written, the next event will have the rest
+            app, error = None, str(e)
+
+        with self.lock:
+            apps = self.apps.setdefault(path, {})
+            if app is not None:
+                apps[name] = app
+            elif error is None:
+                apps.pop(name, None)
+
+            if error is None:
+                self.errors.pop(manifest_path, None)
+            else:
+                self.errors[manifest_path] = error
+            self._changed()
+
+    def _changed(self):
+        self.generation += 1
+        self.updated = time.time()
+
+    def handleChanges(self, changes):
+        if (None, None) in changes:
+            self.loadConfig()
+            for path in list(self.libraries):
+                self.rescanLibrary(path)
+            return
+
+        if any(folder in self.config_folders and name == LIBRARY_VDF for folder, name in changes):
+            self.loadConfig()
+
+        by_folder = dict((self._steamapps(path), path) for path in self.libraries)
+        for folder, name in changes:
+            path = by_folder.get(folder)
+            if name is None:
+                # The folder is gone (or was replaced), so keep trying to watch it
+                self.watcher.unwatch(folder)
+                self._watch(folder)
+                if folder in self.config_folders:
+                    self.loadConfig()
+                if path is not None:
+                    self.rescanLibrary(path)
+            elif path is not None and isManifestName(name):
+                self.updateManifest(path, name)
+
+    def run(self):
+        # Handles changes until stop() is called, which takes up to poll_interval
+        try:
+            while not self.stopped.is_set():
+                changes = self.watcher.read(self.poll_interval)
+
+                with self.lock:
+                    unwatched = list(self.unwatched)
+                for folder in unwatched:
+                    if self._watch(folder):
+                        changes.add((folder, None))
+
+                if changes:
+                    self.handleChanges(changes)
+        finally:
+            self.watcher.close()
+
+    def stop(self):
+        self.stopped.set()
+
+    def _libraryInfo(self, path, details=False):
+        library = self.libraries[path]
+        apps = sorted(self.apps.get(path, {}).values(), key=lambda app: int(app.appid) if app.appid.isdigit() else 0)
+        info = {
+            'key': library['key'],
+            'path': path,
+            'label': library.get('label', ''),
+            'contentid': library.get('contentid', ''),
+            'totalsize': library.get('totalsize', '0'),
+            'watched': self._steamapps(path) not in self.unwatched,
+        }
+        if details:
+            info['apps'] = [app._asdict() for app in apps]
+        else:
+            info['apps'] = dict((app.appid, app.size_on_disk) for app in apps)
+        return info
+
+    def query(self, request):
+        '''
+        Answers one request, a dict with the query in 'query':
+
+          status      the state of the daemon
+          libraries   every library, with apps as appid to SizeOnDisk
+          library     the library at 'path', with every app manifest
+          app         the libraries that have 'appid' installed
+
+        Returns a dict that can be sent as JSON.
+        '''
+        query = request.get('query')
+        with self.lock:
+            if query == 'status':
+                return {
+                    'steam_path': self.steam_path,
+                    'watcher': self.watcher.name,
+                    'generation': self.generation,
+                    'updated': self.updated,
+                    'libraries': len(self.libraries),
+                    'apps': sum(len(apps) for apps in self.apps.values()),
+                    'unwatched': sorted(self.unwatched),
+                    'errors': self.errors.copy(),
+                }
+            if query == 'libraries':
+                return {'generation': self.generation,
+                        'libraries': [self._libraryInfo(path) for path in self.libraries]}
+            if query == 'library':
+                if request.get('path') not in self.libraries:
+                    return {'error': "Not a library folder: {}".format(request.get('path'))}
+                return {'generation': self.generation, 'library': self._libraryInfo(request['path'], True)}
+            if query == 'app':
+                appid = str(request.get('appid'))
+                found = [dict(app._asdict(), library=path) for path in self.libraries
+                         for app in self.apps.get(path, {}).values() if app.appid == appid]
+                return {'generation': self.generation, 'installs': found}
+
+        return {'error': "Unknown query: {}".format(query)}
+
+    def serve(self, socket_path):
+        '''
+        Answers queries on a Unix socket at socket_path while watching for
+        changes, until stop() is called. Each request is a line of JSON, and
+        gets a line of JSON back.
+        '''
+        if not hasattr(socket, 'AF_UNIX'):
+            raise LibrarySetupError("Unix sockets aren't supported on this system")
+
+        # Only a socket left behind by an earlier run is replaced, never a file
+        try:
+            st = os.lstat(socket_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(st.st_mode):
+                raise LibrarySetupError("{} exists and isn't a socket".format(socket_path))
+            os.unlink(socket_path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line.decode('utf-8'))
+                        if not isinstance(request, dict):
+                            raise ValueError("Expected a JSON object")
+                        response = daemon.query(request)
+                    except ValueError as e:
+                        response = {'error': str(e)}
+                    self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+        server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        server.daemon_threads = True
+        os.chmod(socket_path, 0o600)
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.run()
+        finally:
+            server.shutdown()
+            server.server_close()
+            os.unlink(socket_path)
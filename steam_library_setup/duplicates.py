@@ -0,0 +1,178 @@
+'''
+steam_library_setup/duplicates.py
+
+Finds apps installed in more than one library and compares the copies
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from steam_library_setup.sizes import installPath
+
+HASH_WORKERS = None
+HASH_CHUNK_SIZE = 16 * 1048576
+# Chunks are sent to the workers in batches of about this many bytes
+HASH_BATCH_SIZE = 256 * 1048576
+
+InstallCopy = collections.namedtuple("InstallCopy", ("library", "path", "manifest", "files", "size", "missing"))
+
+DuplicateApp = collections.namedtuple("DuplicateApp", (
+    "appid", "copies", "size_mismatch", "content_mismatch", "identical"))
+
+
+def findDuplicateApps(manifests):
+    '''
+    Indexes the apps in manifests (library path to a list of AppManifest)
+    by appid. Returns a dict of appid to a list of (library path,
+    AppManifest) for the apps found in more than one library.
+    '''
+    index = collections.OrderedDict()
+    for library_path, apps in manifests.items():
+        for app in apps:
+            index.setdefault(app.appid, []).append((library_path, app))
+
+    return collections.OrderedDict((appid, copies) for appid, copies in index.items() if len(copies) > 1)
+
+
+def listInstallTree(path):
+    '''
+    Returns a dict of every file under path, by path relative to it, to
+    (size, st_dev, st_ino). Links are not followed. A missing folder is empty.
+    st_ino is 0 where the system can't tell.
+    '''
+    files = {}
+    stack = ['']
+
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(path, relative))
+        except FileNotFoundError:
+            continue
+
+        with entries:
+            for entry in entries:
+                name = os.path.join(relative, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    # DirEntry.stat() leaves st_dev and st_ino at 0 on Windows, os.stat() fills them in
+                    if not st.st_ino:
+                        st = os.stat(entry.path, follow_symlinks=False)
+                    files[name] = (st.st_size, st.st_dev, st.st_ino)
+
+    return files
+
+
+def _hashChunks(chunks):
+    # One batch of (path, offset, length), hashed in a worker process
+    digests = []
+    for path, offset, length in chunks:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f_in:
+            f_in.seek(offset)
+            remaining = length
+            while remaining:
+                data = f_in.read(min(remaining, 1048576))
+                if not data:
+                    break
+                digest.update(data)
+                remaining -= len(data)
+        digests.append(digest.digest())
+    return digests
+
+
+def compareInstalls(copies, max_workers=HASH_WORKERS, chunk_size=HASH_CHUNK_SIZE, executor=None):
+    '''
+    Compares the install folders of the copies of one app, a list of
+    (library path, AppManifest).
+
+    The file lists and sizes are compared first. Only files that every copy
+    has, with the same size, are then read, in chunks of chunk_size hashed on
+    a process pool. Copies of a file that are hardlinks of each other aren't
+    read at all. Pass an executor to share one pool between calls.
+
+    Returns a DuplicateApp. Each InstallCopy lists the files the other copies
+    have and it doesn't in missing. size_mismatch and content_mismatch list
+    the files that differ.
+    '''
+    paths = [installPath(library_path, app.installdir) for library_path, app in copies]
+    trees = [listInstallTree(path) if app.installdir else {} for path, (_, app) in zip(paths, copies)]
+
+    names = set()
+    for tree in trees:
+        names.update(tree)
+
+    size_mismatch = []
+    to_hash = []
+    for name in sorted(names):
+        entries = [tree.get(name) for tree in trees]
+        if any(entry is None for entry in entries):
+            continue
+        if len(set(entry[0] for entry in entries)) > 1:
+            size_mismatch.append(name)
+        elif entries[0][0] > 0 and (len(set(entry[1:] for entry in entries)) > 1 or not entries[0][2]):
+            # Only the same (st_dev, st_ino) everywhere means a hardlink, and 0 means it isn't known
+            to_hash.append((name, entries[0][0]))
+
+    # Cut the files into chunks, and the chunks into batches for the workers
+    batches = [[]]
+    batch_size = 0
+    owners = []
+    for name, size in to_hash:
+        for offset in range(0, size, chunk_size):
+            length = min(chunk_size, size - offset)
+            for i, path in enumerate(paths):
+                batches[-1].append((os.path.join(path, name), offset, length))
+                owners.append((name, i))
+                batch_size += length
+            if batch_size >= HASH_BATCH_SIZE:
+                batches.append([])
+                batch_size = 0
+
+    digests = collections.defaultdict(lambda: [[] for _ in paths])
+    if owners:
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            results = executor.map(_hashChunks, [batch for batch in batches if batch])
+            owner = iter(owners)
+            for batch_digests in results:
+                for digest in batch_digests:
+                    name, i = next(owner)
+                    digests[name][i].append(digest)
+        finally:
+            if own_executor:
+                executor.shutdown()
+
+    content_mismatch = [name for name, _ in to_hash
+                        if any(copy_digests != digests[name][0] for copy_digests in digests[name][1:])]
+
+    install_copies = []
+    for (library_path, app), path, tree in zip(copies, paths, trees):
+        install_copies.append(InstallCopy(library_path, path, app, len(tree),
+                                          sum(entry[0] for entry in tree.values()),
+                                          sorted(names.difference(tree))))
+
+    identical = not size_mismatch and not content_mismatch and not any(copy.missing for copy in install_copies)
+    return DuplicateApp(copies[0][1].appid, install_copies, size_mismatch, content_mismatch, identical)
+
+
+def compareDuplicateApps(manifests, max_workers=HASH_WORKERS, chunk_size=HASH_CHUNK_SIZE):
+    '''
+    Finds the apps installed in more than one library (see findDuplicateApps)
+    and compares their copies (see compareInstalls), sharing one process
+    pool. Returns a list of DuplicateApp.
+    '''
+    duplicates = findDuplicateApps(manifests)
+    if not duplicates:
+        return []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return [compareInstalls(copies, max_workers, chunk_size, executor) for copies in duplicates.values()]
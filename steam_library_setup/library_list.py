@@ -0,0 +1,71 @@
+'''
+steam_library_setup/library_list.py
+
+The list of library folders being edited, without any GUI
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import itertools
+
+
+class LibraryListModel(object):
+    '''
+    The rows of the library list, in order. Every row gets an id that stays
+    the same while it exists, so a view can keep one item per row and only
+    touch that item when the row changes. Adding or removing a row doesn't
+    renumber the others.
+
+    The first fixed rows (the Steam library) can't be changed or removed.
+    '''
+
+    def __init__(self, paths=(), fixed=0):
+        self.rows = collections.OrderedDict()
+        self.fixed = set()
+        self._ids = itertools.count()
+
+        for i, path in enumerate(paths):
+            row_id = self.append(path)
+            if i < fixed:
+                self.fixed.add(row_id)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        # (row id, path) of every row, in order
+        return iter(list(self.rows.items()))
+
+    def __contains__(self, row_id):
+        return row_id in self.rows
+
+    def isFixed(self, row_id):
+        return row_id in self.fixed
+
+    def get(self, row_id):
+        return self.rows[row_id]
+
+    def append(self, path=''):
+        row_id = 'row{}'.format(next(self._ids))
+        self.rows[row_id] = path
+        return row_id
+
+    def set(self, row_id, path):
+        if row_id in self.fixed:
+            raise ValueError("The Steam library can't be changed")
+        if row_id not in self.rows:
+            raise KeyError(row_id)
+        self.rows[row_id] = path
+
+    def remove(self, row_id):
+        if row_id in self.fixed:
+            raise ValueError("The Steam library can't be removed")
+        del self.rows[row_id]
+
+    def paths(self):
+        return list(self.rows.values())
+
+    def listedLibraries(self):
+        # What to pass to LibrarySetup.applyLibraries(): the rows that can be edited and aren't empty
+        return [path for row_id, path in self.rows.items() if row_id not in self.fixed and path]
@@ -0,0 +1,89 @@
+'''
+steam_library_setup/loader.py
+
+Finds Steam and reads its library folders in the background
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import queue
+import threading
+
+from steam_library_setup.core import LibrarySetup, LibrarySetupError, findSteamExe
+
+
+class LibraryLoader(object):
+    '''
+    Looks up Steam in the registry and reads its libraryfolders.vdf on a
+    worker thread, so a GUI can stay responsive. What happens is put on
+    queue as (kind, value), for the GUI thread to pick up:
+
+      progress         (step, steps, text) before each step
+      need_steam_path  None: Steam wasn't found, call resume() with a path
+      loaded           the LibrarySetup
+      error            the reason, as a string
+      cancelled        None, once a cancel() was noticed
+
+    confirm is passed on to LibrarySetup. A steam_path skips the registry.
+    '''
+
+    STEPS = 3
+
+    def __init__(self, steam_path=None, confirm=None):
+        self.steam_path = steam_path
+        self.confirm = confirm
+        self.queue = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def start(self):
+        self._run(self._find)
+
+    def resume(self, steam_path):
+        # Carries on after need_steam_path, with the path the user picked
+        self.steam_path = steam_path
+        self._run(self._load)
+
+    def cancel(self):
+        # The step that is running can't be interrupted, but nothing is reported after it
+        self.cancelled.set()
+
+    def _run(self, target):
+        # A daemon thread, so a hung drive can't keep the program from exiting
+        threading.Thread(target=target, name="loader", daemon=True).start()
+
+    def _progress(self, step, text):
+        if self.cancelled.is_set():
+            self.queue.put(('cancelled', None))
+            return False
+        self.queue.put(('progress', (step, self.STEPS, text)))
+        return True
+
+    def _find(self):
+        if self.steam_path is None:
+            if not self._progress(0, "Looking for Steam"):
+                return
+            self.steam_path = findSteamExe()
+
+        if not self._progress(1, "Checking Steam.exe"):
+            return
+        if self.steam_path == '' or not os.path.exists(self.steam_path):
+            self.queue.put(('need_steam_path', None))
+            return
+
+        self._load()
+
+    def _load(self):
+        if not self._progress(2, "Reading library folders"):
+            return
+
+        try:
+            setup = LibrarySetup(self.steam_path, confirm=self.confirm)
+        except (LibrarySetupError, OSError, SyntaxError, UnicodeError) as e:
+            self.queue.put(('error', str(e)))
+            return
+
+        if self.cancelled.is_set():
+            self.queue.put(('cancelled', None))
+        else:
+            self.queue.put(('loaded', setup))
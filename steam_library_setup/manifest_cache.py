@@ -0,0 +1,78 @@
+'''
+steam_library_setup/manifest_cache.py
+
+Remembers what was read from app manifests, so a rescan only reads what changed
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import json
+import os
+
+from steam_library_setup.writer import replaceFile
+
+
+class ManifestCache(object):
+    '''
+    The fields of every app manifest read so far, stored as JSON at path.
+
+    For each steamapps folder, the cache keeps the folder's mtime_ns and,
+    per manifest path, [mtime_ns, size, appid, name, installdir,
+    SizeOnDisk, StateFlags], or only [mtime_ns, size] if it couldn't be
+    read. A manifest whose mtime_ns and size haven't changed doesn't need
+    to be read again.
+
+    Several processes can share one file: save() only writes the folders
+    that this cache updated over what is in the file by then.
+    '''
+
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path
+        self.folders = {}
+        self.updated = set()
+
+    @classmethod
+    def load(cls, path):
+        cache = cls(path)
+        cache.folders = cls._readFolders(path)
+        return cache
+
+    @classmethod
+    def _readFolders(cls, path):
+        # A missing, broken or outdated cache file just means starting over
+        try:
+            with open(path, 'r', encoding='utf-8') as f_in:
+                data = json.load(f_in)
+        except (OSError, ValueError):
+            return {}
+
+        if isinstance(data, dict) and data.get('version') == cls.VERSION:
+            return data.get('folders', {})
+        return {}
+
+    def save(self, path=None):
+        path = path or self.path
+        if path is None or not self.updated:
+            return
+
+        # Another install may have saved its folders since this cache was loaded
+        folders = self._readFolders(path)
+        folders.update((key, self.folders[key]) for key in self.updated)
+        self.folders = folders
+
+        data = json.dumps({'version': self.VERSION, 'folders': folders}, separators=(',', ':'))
+        replaceFile(path, data.encode('utf-8'))
+        self.updated = set()
+
+    def folder(self, steamapps):
+        # The cached entry of a steamapps folder, or None
+        return self.folders.get(os.path.normcase(steamapps))
+
+    def updateFolder(self, steamapps, mtime_ns, files):
+        key = os.path.normcase(steamapps)
+        entry = {'mtime_ns': mtime_ns, 'files': files}
+        if self.folders.get(key) != entry:
+            self.folders[key] = entry
+            self.updated.add(key)
@@ -0,0 +1,175 @@
+'''
+steam_library_setup/manifests.py
+
+Reads the appmanifest_*.acf files of library folders in parallel
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import os
+import vdf
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from steam_library_setup.writer import ENCODING, ENCODING_ERRORS
+
+MANIFEST_WORKERS = None
+MANIFEST_BATCH_SIZE = 64
+
+AppManifest = collections.namedtuple("AppManifest", (
+    "appid", "name", "installdir", "size_on_disk", "state_flags", "path"))
+
+ManifestScan = collections.namedtuple("ManifestScan", ("manifests", "errors"))
+
+
+def isManifestName(name):
+    name = name.lower()
+    return name.startswith('appmanifest_') and name.endswith('.acf')
+
+
+def statManifests(library_path, cached=None):
+    '''
+    Returns the mtime_ns of the library's steamapps folder (None if there
+    isn't one) and a list of (path, mtime_ns, size) for its app manifests.
+
+    cached is the ManifestCache entry of the folder. If the folder hasn't
+    changed since, no manifests were added or removed, so the cached
+    manifests are checked one by one instead of listing the folder.
+    '''
+    steamapps = os.path.join(library_path, 'steamapps')
+    try:
+        folder_mtime = os.stat(steamapps).st_mtime_ns
+    except FileNotFoundError:
+        return None, []
+
+    found = []
+    if cached is not None and cached['mtime_ns'] == folder_mtime:
+        for path in cached['files']:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            found.append((path, st.st_mtime_ns, st.st_size))
+    else:
+        with os.scandir(steamapps) as entries:
+            for entry in entries:
+                if isManifestName(entry.name) and entry.is_file():
+                    st = entry.stat()
+                    found.append((entry.path, st.st_mtime_ns, st.st_size))
+
+    return folder_mtime, found
+
+
+def readManifest(path):
+    with open(path, 'r', encoding=ENCODING, errors=ENCODING_ERRORS) as f_in:
+        info = vdf.load(f_in)
+
+    if not info:
+        raise SyntaxError("Empty app manifest")
+
+    state = info[list(info.keys())[0]]
+    if not isinstance(state, dict) or 'appid' not in state:
+        raise SyntaxError("Not an app manifest")
+
+    return AppManifest(state['appid'], state.get('name', ''), state.get('installdir', ''),
+                       state.get('SizeOnDisk', '0'), state.get('StateFlags', '0'), path)
+
+
+def _readManifests(paths):
+    # One batch of manifests, so a process pool isn't sent one file at a time
+    results = []
+    for path in paths:
+        try:
+            results.append(readManifest(path))
+        except (OSError, SyntaxError, UnicodeError) as e:
+            results.append((path, str(e)))
+    return results
+
+
+def scanManifests(library_paths, max_workers=MANIFEST_WORKERS, progress=None, use_processes=False, cache=None):
+    '''
+    Reads the app manifests of every library in library_paths.
+
+    The steamapps folders are listed in parallel, then the manifests are
+    parsed in batches, on threads or with use_processes on processes, using
+    up to max_workers at once. progress is called as progress(done, total)
+    after every batch, counting manifests.
+
+    With a ManifestCache, only new or changed manifests are parsed, and the
+    cache is updated (but not saved).
+
+    Returns a ManifestScan. manifests maps each library path to a list of
+    AppManifest sorted by appid, and errors is a list of (path, reason) for
+    the libraries and manifests that couldn't be read.
+    '''
+    library_paths = list(collections.OrderedDict.fromkeys(library_paths))
+    manifests = collections.OrderedDict((path, []) for path in library_paths)
+    errors = []
+
+    def cachedFolder(library_path):
+        return cache.folder(os.path.join(library_path, 'steamapps')) if cache is not None else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as listing:
+        futures = [(path, listing.submit(statManifests, path, cachedFolder(path))) for path in library_paths]
+
+        # Take what the cache still has right, and parse the rest
+        listed = []
+        batches = []
+        for library_path, future in futures:
+            try:
+                folder_mtime, found = future.result()
+            except OSError as e:
+                errors.append((library_path, str(e)))
+                continue
+
+            cached = cachedFolder(library_path)
+            cached_files = cached['files'] if cached is not None else {}
+            stale = []
+            for path, mtime_ns, size in found:
+                fields = cached_files.get(path)
+                if fields is not None and len(fields) > 2 and fields[0] == mtime_ns and fields[1] == size:
+                    manifests[library_path].append(AppManifest(*(fields[2:] + [path])))
+                else:
+                    stale.append(path)
+
+            listed.append((library_path, folder_mtime, found))
+            for i in range(0, len(stale), MANIFEST_BATCH_SIZE):
+                batches.append((library_path, stale[i:i + MANIFEST_BATCH_SIZE]))
+
+    total = sum(len(paths) for _, paths in batches)
+    done = 0
+    if progress is not None:
+        progress(done, total)
+
+    if batches:
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers=max_workers) as parsing:
+            futures = dict((parsing.submit(_readManifests, paths), library_path) for library_path, paths in batches)
+
+            for future in as_completed(futures):
+                for result in future.result():
+                    if isinstance(result, AppManifest):
+                        manifests[futures[future]].append(result)
+                    else:
+                        errors.append(result)
+                    done += 1
+
+                if progress is not None:
+                    progress(done, total)
+
+    if cache is not None:
+        # Manifests that couldn't be read are kept without fields, so they are tried again next time
+        for library_path, folder_mtime, found in listed:
+            if folder_mtime is None:
+                continue
+            apps = dict((app.path, app) for app in manifests[library_path])
+            files = {}
+            for path, mtime_ns, size in found:
+                app = apps.get(path)
+                files[path] = [mtime_ns, size] + (list(app[:-1]) if app is not None else [])
+            cache.updateFolder(os.path.join(library_path, 'steamapps'), folder_mtime, files)
+
+    for apps in manifests.values():
+        apps.sort(key=lambda app: int(app.appid) if app.appid.isdigit() else 0)
+
+    return ManifestScan(manifests, errors)
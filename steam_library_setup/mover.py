@@ -0,0 +1,293 @@
+'''
+steam_library_setup/mover.py
+
+Moves installed apps from one library folder to another
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import errno
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from steam_library_setup.sizes import installPath
+from steam_library_setup.writer import replaceFile
+
+MOVE_WORKERS = 4
+COPY_CHUNK_SIZE = 64 * 1048576
+
+MoveResult = collections.namedtuple("MoveResult", ("appid", "source", "destination", "renamed", "files", "size"))
+
+
+class MoveError(OSError):
+    pass
+
+
+def journalPath(library_path, appid):
+    return os.path.join(library_path, 'steamapps', '.appmove_{}.json'.format(appid))
+
+
+def pendingMoves(library_path):
+    # Journals of the moves into library_path that didn't finish
+    steamapps = os.path.join(library_path, 'steamapps')
+    try:
+        with os.scandir(steamapps) as entries:
+            return [entry.path for entry in entries
+                    if entry.name.startswith('.appmove_') and entry.name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+
+
+def moveApp(app, source_library, destination_library, max_workers=MOVE_WORKERS, verify=True, progress=None):
+    '''
+    Moves app (an AppManifest from source_library) to destination_library:
+    its install folder under steamapps/common, then its app manifest.
+
+    On the same drive, both are renamed. Otherwise the files are copied on up
+    to max_workers threads, checked against the originals when verify is set
+    (by hash), and only then is the manifest put in place and the source
+    deleted. progress is called as progress(copied, total) in bytes.
+
+    A journal in the destination steamapps folder keeps track of a move
+    between drives. Calling moveApp again, or resumeMove() with the journal,
+    picks up where an interrupted move left off.
+    '''
+    job = {
+        'appid': app.appid,
+        'installdir': app.installdir,
+        'manifest': os.path.basename(app.path),
+        'source': source_library,
+        'destination': destination_library,
+        'state': 'copy',
+    }
+    if not app.installdir:
+        raise MoveError("App {} has no installdir in its app manifest".format(app.appid))
+
+    journal = journalPath(destination_library, app.appid)
+    if os.path.exists(journal):
+        return resumeMove(journal, max_workers, verify, progress)
+
+    destination_manifest = os.path.join(destination_library, 'steamapps', job['manifest'])
+    if os.path.exists(destination_manifest):
+        raise MoveError("App {} is already installed in {}".format(app.appid, destination_library))
+
+    # Only a journal says what's already in the destination folder was copied by
+    # this move. Without a source, it's a rename that was interrupted.
+    source_dir = installPath(source_library, app.installdir)
+    destination_dir = installPath(destination_library, app.installdir)
+    if os.path.exists(source_dir) and os.path.exists(destination_dir):
+        raise MoveError("{} already exists".format(destination_dir))
+
+    common = os.path.join(destination_library, 'steamapps', 'common')
+    os.makedirs(common, exist_ok=True)
+
+    if _sameDevice(source_dir, common):
+        return _renameApp(job)
+
+    _writeJournal(journal, job)
+    return _copyApp(job, journal, max_workers, verify, progress)
+
+
+def resumeMove(journal, max_workers=MOVE_WORKERS, verify=True, progress=None):
+    with open(journal, 'r', encoding='utf-8') as f_in:
+        job = json.load(f_in)
+    return _copyApp(job, journal, max_workers, verify, progress)
+
+
+def _sameDevice(source_dir, destination_dir):
+    # A source that is already gone was renamed before, so renaming is what's left
+    try:
+        return os.stat(source_dir).st_dev == os.stat(destination_dir).st_dev
+    except FileNotFoundError:
+        return True
+
+
+def _writeJournal(journal, job):
+    replaceFile(journal, json.dumps(job).encode('utf-8'))
+
+
+def _paths(job):
+    source_steamapps = os.path.join(job['source'], 'steamapps')
+    destination_steamapps = os.path.join(job['destination'], 'steamapps')
+    return (installPath(job['source'], job['installdir']), installPath(job['destination'], job['installdir']),
+            os.path.join(source_steamapps, job['manifest']), os.path.join(destination_steamapps, job['manifest']))
+
+
+def _renameApp(job):
+    source_dir, destination_dir, source_manifest, destination_manifest = _paths(job)
+
+    # Each step is skipped if it was already done, so this can be run again after a crash
+    if os.path.exists(source_dir):
+        if os.path.exists(destination_dir):
+            raise MoveError("{} already exists".format(destination_dir))
+        os.rename(source_dir, destination_dir)
+    if os.path.exists(source_manifest):
+        os.rename(source_manifest, destination_manifest)
+
+    _, files, _ = _listTree(destination_dir)
+    return MoveResult(job['appid'], job['source'], job['destination'], True, len(files),
+                      sum(size for size, _ in files.values()))
+
+
+def _listTree(path):
+    # Folders, files (with size and mtime_ns) and links under path, by relative
+    # path. An app that isn't downloaded yet may have no folder at all.
+    folders, files, links = [], {}, {}
+    stack = ['']
+
+    while stack:
+        relative = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(path, relative))
+        except FileNotFoundError:
+            continue
+
+        with entries:
+            for entry in entries:
+                name = os.path.join(relative, entry.name)
+                if entry.is_symlink():
+                    links[name] = os.readlink(entry.path)
+                elif entry.is_dir():
+                    folders.append(name)
+                    stack.append(name)
+                else:
+                    st = entry.stat()
+                    files[name] = (st.st_size, st.st_mtime_ns)
+
+    return folders, files, links
+
+
+def _copyApp(job, journal, max_workers, verify, progress):
+    source_dir, destination_dir, source_manifest, destination_manifest = _paths(job)
+
+    if job['state'] == 'copy':
+        folders, files, links = _listTree(source_dir)
+        total = sum(size for size, _ in files.values())
+
+        for folder in [''] + folders:
+            os.makedirs(os.path.join(destination_dir, folder), exist_ok=True)
+        for name, target in links.items():
+            if not os.path.lexists(os.path.join(destination_dir, name)):
+                os.symlink(target, os.path.join(destination_dir, name))
+
+        # A file that is already there with the same size and mtime was copied before
+        # the move was interrupted. Files are copied under another name first.
+        todo = []
+        copied = [0]
+        for name, (size, mtime_ns) in files.items():
+            try:
+                st = os.stat(os.path.join(destination_dir, name))
+                if st.st_size == size and st.st_mtime_ns == mtime_ns:
+                    copied[0] += size
+                    continue
+            except FileNotFoundError:
+                pass
+            todo.append(name)
+
+        lock = threading.Lock()
+
+        def copy(name):
+            size = _copyFile(os.path.join(source_dir, name), os.path.join(destination_dir, name))
+            if progress is not None:
+                with lock:
+                    copied[0] += size
+                    progress(copied[0], total)
+
+        if progress is not None:
+            progress(copied[0], total)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(copy, todo))
+
+        if verify:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(lambda name: _hashFile(os.path.join(source_dir, name)) ==
+                                       _hashFile(os.path.join(destination_dir, name)), files)
+                different = [name for name, same in zip(files, results) if not same]
+            if different:
+                # Dropping the mtime makes the next attempt copy these again
+                for name in different:
+                    os.utime(os.path.join(destination_dir, name), ns=(0, 0))
+                raise MoveError("{} files were not copied correctly, for example {}".format(
+                    len(different), different[0]))
+
+        # The manifest makes Steam see the app in its new place, so it goes last
+        with open(source_manifest, 'rb') as f_in:
+            replaceFile(destination_manifest, f_in.read())
+
+        job['state'] = 'cleanup'
+        job['files'] = len(files)
+        job['size'] = total
+        _writeJournal(journal, job)
+
+    # The source manifest goes first, so Steam never sees a half deleted app
+    if os.path.exists(source_manifest):
+        os.unlink(source_manifest)
+    if os.path.exists(source_dir):
+        shutil.rmtree(source_dir)
+    os.unlink(journal)
+
+    return MoveResult(job['appid'], job['source'], job['destination'], False, job['files'], job['size'])
+
+
+def _copyFile(source, destination):
+    # Copies to a temporary name and renames it when done, keeping the mtime
+    partial = destination + '.part'
+    with open(source, 'rb') as f_in, open(partial, 'wb') as f_out:
+        size = os.fstat(f_in.fileno()).st_size
+        _copyData(f_in.fileno(), f_out.fileno(), size)
+    shutil.copystat(source, partial)
+    os.replace(partial, destination)
+    return size
+
+
+def _copyData(source_fd, destination_fd, size):
+    # The kernel does the copy where it can, with plain reads and writes as a fallback
+    offset = 0
+    fallback_errors = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP)
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < size:
+                copied = os.copy_file_range(source_fd, destination_fd, min(COPY_CHUNK_SIZE, size - offset))
+                if copied == 0:
+                    return
+                offset += copied
+            return
+        except OSError as e:
+            if offset or e.errno not in fallback_errors:
+                raise
+
+    if hasattr(os, 'sendfile'):
+        try:
+            while offset < size:
+                copied = os.sendfile(destination_fd, source_fd, offset, min(COPY_CHUNK_SIZE, size - offset))
+                if copied == 0:
+                    return
+                offset += copied
+            return
+        except OSError as e:
+            if offset or e.errno not in fallback_errors:
+                raise
+
+    while True:
+        data = os.read(source_fd, 1048576)
+        if not data:
+            return
+        # os.write() can write less than it was given
+        view = memoryview(data)
+        while view:
+            view = view[os.write(destination_fd, view):]
+
+
+def _hashFile(path):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f_in:
+        for chunk in iter(lambda: f_in.read(1048576), b''):
+            digest.update(chunk)
+    return digest.digest()
@@ -0,0 +1,112 @@
+'''
+steam_library_setup/probe.py
+
+Checks all library folders at once, without letting a slow drive hold up the rest
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import os
+import shutil
+import threading
+import time
+
+from steam_library_setup import trace
+from steam_library_setup.contentids import readLibraryFolderInfo
+
+PROBE_WORKERS = 8
+PROBE_TIMEOUT = 5.0
+
+LibraryProbe = collections.namedtuple("LibraryProbe", (
+    "path", "reachable", "timed_out", "total", "free", "steamapps", "contentid", "label", "error"))
+
+
+def probeLibrary(path):
+    '''
+    Looks at one library folder. total and free are in bytes, and are None
+    if the folder can't be reached. contentid and label come from its
+    libraryfolder.vdf, and are None if there isn't one.
+    '''
+    try:
+        trace.count('files_stated')
+        if not os.path.isdir(path):
+            return LibraryProbe(path, False, False, None, None, False, None, None, "Not found")
+
+        usage = shutil.disk_usage(path)
+        trace.count('files_stated')
+        steamapps = os.path.isdir(os.path.join(path, 'steamapps'))
+    except OSError as e:
+        return LibraryProbe(path, False, False, None, None, False, None, None, str(e))
+
+    # A broken libraryfolder.vdf doesn't make the library unreachable
+    contentid = label = error = None
+    try:
+        info = readLibraryFolderInfo(path)
+    except (OSError, SyntaxError) as e:
+        info = None
+        error = str(e)
+
+    if info is not None:
+        contentid = info.get('contentid')
+        label = info.get('label')
+
+    return LibraryProbe(path, True, False, usage.total, usage.free, steamapps, contentid, label, error)
+
+
+def probeLibraries(paths, timeout=PROBE_TIMEOUT, max_workers=PROBE_WORKERS):
+    '''
+    Probes the library folders in paths using up to max_workers threads, and
+    returns a dict of path to LibraryProbe.
+
+    A probe that takes longer than timeout seconds gives an unreachable result
+    with timed_out set. Its thread is left behind (it can't be interrupted)
+    and another one takes its place, so the remaining paths still get probed.
+    '''
+    pending = collections.deque(collections.OrderedDict.fromkeys(paths))
+    count = len(pending)
+    results = {}
+    started = {}
+    cond = threading.Condition()
+
+    def worker():
+        while True:
+            with cond:
+                if not pending:
+                    return
+                path = pending.popleft()
+                started[path] = time.monotonic()
+                cond.notify()
+
+            with trace.span('probeLibrary', path=path):
+                probe = probeLibrary(path)
+
+            with cond:
+                # Someone else took over if this one timed out
+                if started.pop(path, None) is None:
+                    return
+                results[path] = probe
+                cond.notify()
+
+    def startWorker():
+        # Daemon threads, so a hung drive can't keep the process from exiting
+        threading.Thread(target=worker, name="probe", daemon=True).start()
+
+    with cond:
+        for _ in range(min(max_workers, count)):
+            startWorker()
+
+        while len(results) < count:
+            now = time.monotonic()
+            for path, start in list(started.items()):
+                if now - start >= timeout:
+                    del started[path]
+                    results[path] = LibraryProbe(path, False, True, None, None, False, None, None, "Timed out")
+                    if pending:
+                        startWorker()
+
+            if len(results) < count:
+                wait = min(started.values()) + timeout - now if started else None
+                cond.wait(wait)
+
+    return results
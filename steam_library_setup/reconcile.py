@@ -0,0 +1,97 @@
+'''
+steam_library_setup/reconcile.py
+
+Works out which library folders to keep, remove and add
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import os
+import re
+
+Reconciliation = collections.namedtuple("Reconciliation", ("keep", "remove", "add"))
+
+_re_separators = re.compile(r'[\\/]+')
+
+
+def isLibraryKey(key):
+    # Library folders are stored under numbered keys, everything else is metadata
+    try:
+        int(key)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def normalizeLibraryPath(path, resolve=False):
+    '''
+    Returns the form of path used to compare library folders. Case and the
+    kind of separators don't matter, doubled backslashes from old files are
+    collapsed and a trailing steamapps folder is dropped. With resolve, links
+    are resolved first (this touches the disk).
+    '''
+    if resolve:
+        path = os.path.realpath(path)
+
+    # Keep the leading \\ of a network path
+    prefix = ''
+    if path[:2] in ('\\\\', '//'):
+        prefix = '\\\\'
+        path = path[2:]
+
+    path = _re_separators.sub('\\\\', path).rstrip('\\')
+    if path.lower().endswith('\\steamapps'):
+        path = path[:-len('\\steamapps')]
+
+    return (prefix + path).casefold()
+
+
+def reconcileLibraries(libraries, listed_libraries, pinned=(), resolve=False):
+    '''
+    Compares the library folders in libraries (the libraryfolders block) with
+    listed_libraries, the paths that should be there. Keys in pinned are always
+    kept, and count as being listed.
+
+    Returns a Reconciliation of the keys to keep, the keys to remove and the
+    paths to add, in their original order. Libraries that show up more than
+    once are only kept or added once.
+    '''
+    wanted = collections.OrderedDict()
+    for path in listed_libraries:
+        wanted.setdefault(normalizeLibraryPath(path, resolve), path)
+
+    existing = set()
+    keep = []
+    remove = []
+    for key in libraries:
+        if not isLibraryKey(key):
+            continue
+
+        path = normalizeLibraryPath(libraries[key]['path'], resolve)
+        if key in pinned or (path in wanted and path not in existing):
+            existing.add(path)
+            keep.append(key)
+        else:
+            remove.append(key)
+
+    add = [path for normalized, path in wanted.items() if normalized not in existing]
+
+    return Reconciliation(keep, remove, add)
+
+
+def allocateLibraryKeys(libraries, count):
+    '''
+    Returns the count lowest library keys that aren't used in libraries,
+    starting from 1.
+    '''
+    used = set(key for key in libraries if isLibraryKey(key))
+
+    keys = []
+    index = 1
+    while len(keys) < count:
+        if str(index) not in used:
+            keys.append(str(index))
+        index += 1
+
+    return keys
@@ -0,0 +1,151 @@
+'''
+steam_library_setup/sizes.py
+
+Measures how much disk space installed apps really take
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SIZE_WORKERS = 8
+
+AppSize = collections.namedtuple("AppSize", ("appid", "path", "size", "files", "complete", "error"))
+
+LibrarySize = collections.namedtuple("LibrarySize", ("path", "size", "apps", "complete"))
+
+
+def allocatedSize(st):
+    # Space taken on disk, which is what SizeOnDisk is about. Windows has no
+    # st_blocks, so it falls back to the file size there.
+    blocks = getattr(st, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def installPath(library_path, installdir):
+    return os.path.join(library_path, 'steamapps', 'common', installdir)
+
+
+class _SizeWalk(object):
+    # What the walkers share: the hardlinks already counted and the budget
+
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.total = 0
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def walk(self, path):
+        '''
+        Adds up the allocated size of everything under path, without following
+        links. Files with more than one link are only counted the first time
+        any walker sees them. Returns (size, files, complete).
+        '''
+        size = 0
+        files = 0
+        stack = [path]
+
+        while stack:
+            if self.stopped.is_set():
+                return size, files, False
+
+            # A folder that isn't there (an app that isn't downloaded yet, or a
+            # file removed while walking) doesn't take any space
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+
+            counted = 0
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    # Windows leaves st_nlink at 0 in DirEntry.stat(), so no dedupe there
+                    if st.st_nlink > 1:
+                        key = (st.st_dev, st.st_ino)
+                        with self.lock:
+                            if key in self.seen:
+                                continue
+                            self.seen.add(key)
+
+                    counted += allocatedSize(st)
+                    files += 1
+
+            size += counted
+            if self.budget is not None:
+                with self.lock:
+                    self.total += counted
+                    if self.total > self.budget:
+                        self.stopped.set()
+
+        return size, files, True
+
+
+def measureApps(apps, max_workers=SIZE_WORKERS, budget=None, progress=None):
+    '''
+    Measures the install folders in apps, a list of (appid, path), several
+    at once. Once more than budget bytes have been counted in total, all
+    walks stop and the apps not finished are returned with complete unset.
+    progress is called as progress(done, total) after every app.
+
+    Returns a list of AppSize in the order of apps. An app whose folder
+    can't be read has the reason in error, and one without a path counts
+    as empty.
+    '''
+    sizes = [None] * len(apps)
+    walk = _SizeWalk(budget)
+    done = 0
+
+    def measure(appid, path):
+        if path is None:
+            return AppSize(appid, path, 0, 0, True, None)
+        try:
+            size, files, complete = walk.walk(path)
+        except OSError as e:
+            return AppSize(appid, path, 0, 0, False, str(e))
+        return AppSize(appid, path, size, files, complete, None)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict((executor.submit(measure, appid, path), i) for i, (appid, path) in enumerate(apps))
+
+        for future in as_completed(futures):
+            sizes[futures[future]] = future.result()
+            done += 1
+            if progress is not None:
+                progress(done, len(apps))
+
+    return sizes
+
+
+def measureLibraries(manifests, max_workers=SIZE_WORKERS, budget=None, progress=None):
+    '''
+    Measures every app in manifests, a dict of library path to a list of
+    AppManifest (see scanManifests), in one go so the work is spread over
+    all libraries. Returns a list of LibrarySize, one per library.
+    '''
+    apps = []
+    owners = []
+    for library_path, library_apps in manifests.items():
+        for app in library_apps:
+            # Without an installdir, the path would be all of steamapps/common
+            apps.append((app.appid, installPath(library_path, app.installdir) if app.installdir else None))
+            owners.append(library_path)
+
+    by_library = collections.OrderedDict((library_path, []) for library_path in manifests)
+    for library_path, app_size in zip(owners, measureApps(apps, max_workers, budget, progress)):
+        by_library[library_path].append(app_size)
+
+    return [LibrarySize(library_path, sum(app.size for app in app_sizes), app_sizes,
+                        all(app.complete or app.error is not None for app in app_sizes))
+            for library_path, app_sizes in by_library.items()]
@@ -0,0 +1,226 @@
+'''
+steam_library_setup/trace.py
+
+Times where a run spends its time, and writes it down as JSON
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import collections
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Set to a file name to write a trace there, and to a comma separated list of
+# PROFILERS to profile as well
+TRACE_ENV = 'STEAM_LIBRARY_SETUP_TRACE'
+PROFILE_ENV = 'STEAM_LIBRARY_SETUP_PROFILE'
+# Where the trace goes when only PROFILE_ENV is set
+TRACE_FILE = 'steam_library_setup_trace.json'
+
+PROFILERS = ('cprofile', 'tracemalloc')
+PROFILE_TOP = 50
+
+_tracer = None
+_no_span = contextlib.nullcontext()
+
+
+class Tracer(object):
+    '''
+    Collects spans (named, timed pieces of work, nested per thread) and
+    counters (bytes_read, bytes_written, files_stated, vdf_keys, ...).
+    Counts go to the innermost span of the thread, and to the totals.
+
+    profile is a list of PROFILERS to run alongside. cProfile only sees the
+    thread that created the Tracer. The profilers are only imported when
+    asked for, so importing this module stays cheap.
+    '''
+
+    VERSION = 1
+
+    def __init__(self, path=None, profile=()):
+        unknown = set(profile).difference(PROFILERS)
+        if unknown:
+            raise ValueError("Unknown profiler: {}".format(", ".join(sorted(unknown))))
+
+        self.path = path
+        self.profile = tuple(profile)
+        self.spans = []
+        self.counters = collections.Counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = time.time()
+        self.clock = time.perf_counter()
+        self.duration = None
+        self.results = {}
+
+        self.profiler = None
+        if 'cprofile' in self.profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if 'tracemalloc' in self.profile:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        stack = self._stack()
+        record = {
+            'name': name,
+            'start': time.perf_counter() - self.clock,
+            'duration': None,
+            'thread': threading.current_thread().name,
+            'parent': stack[-1]['id'] if stack else None,
+            'attrs': attrs,
+            'counters': {},
+        }
+        with self.lock:
+            record['id'] = len(self.spans)
+            self.spans.append(record)
+
+        stack.append(record)
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = "{}: {}".format(type(e).__name__, e)
+            raise
+        finally:
+            record['duration'] = time.perf_counter() - self.clock - record['start']
+            stack.pop()
+
+    def count(self, name, amount=1):
+        stack = self._stack()
+        with self.lock:
+            self.counters[name] += amount
+            if stack:
+                counters = stack[-1]['counters']
+                counters[name] = counters.get(name, 0) + amount
+
+    def stop(self):
+        # Stops the profilers and keeps what they found
+        self.duration = time.perf_counter() - self.clock
+
+        if self.profiler is not None:
+            import pstats
+            self.profiler.disable()
+            stats = pstats.Stats(self.profiler)
+            rows = []
+            for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+                rows.append({'function': "{}:{}({})".format(filename, line, function), 'calls': calls,
+                             'total': total, 'cumulative': cumulative})
+            rows.sort(key=lambda row: row['cumulative'], reverse=True)
+            self.results['cprofile'] = rows[:PROFILE_TOP]
+            self.profiler = None
+
+        if 'tracemalloc' in self.profile:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                top = tracemalloc.take_snapshot().statistics('lineno')[:PROFILE_TOP]
+                tracemalloc.stop()
+                self.results['tracemalloc'] = {
+                    'current': current,
+                    'peak': peak,
+                    'top': [{'where': str(stat.traceback), 'size': stat.size, 'count': stat.count}
+                            for stat in top],
+                }
+
+    def asDict(self):
+        with self.lock:
+            return {
+                'version': self.VERSION,
+                'started': self.started,
+                'duration': self.duration,
+                'pid': os.getpid(),
+                'argv': sys.argv,
+                'spans': [dict(span) for span in self.spans],
+                'counters': dict(self.counters),
+                'profile': self.results,
+            }
+
+    def write(self, path=None):
+        with open(path or self.path, 'w', encoding='utf-8') as f_out:
+            json.dump(self.asDict(), f_out, indent=1)
+            f_out.write('\n')
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **attrs):
+    '''
+    A context manager timing the work done in it as a span, or doing
+    nothing when tracing is off.
+    '''
+    if _tracer is None:
+        return _no_span
+    return _tracer.span(name, **attrs)
+
+
+def count(name, amount=1):
+    if _tracer is not None:
+        _tracer.count(name, amount)
+
+
+def traced(name):
+    # Decorator putting every call of a function in a span
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def countKeys(obj):
+    # Number of keys in a parsed .vdf file, at every level
+    keys = 0
+    stack = [obj]
+    while stack:
+        node = stack.pop()
+        keys += len(node)
+        stack.extend(value for value in node.values() if hasattr(value, 'values'))
+    return keys
+
+
+def startTracing(path=None, profile=()):
+    global _tracer
+    _tracer = Tracer(path, profile)
+    return _tracer
+
+
+def startTracingFromEnvironment():
+    # Does nothing unless TRACE_ENV or PROFILE_ENV is set
+    path = os.environ.get(TRACE_ENV) or None
+    profile = [name.strip() for name in os.environ.get(PROFILE_ENV, '').split(',') if name.strip()]
+    if path is None and not profile:
+        return None
+    return startTracing(path or TRACE_FILE, profile)
+
+
+def stopTracing():
+    '''
+    Stops tracing and writes the trace to the file it was started with.
+    Returns the Tracer, or None if tracing wasn't on.
+    '''
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.stop()
+        if tracer.path:
+            tracer.write()
+    return tracer
@@ -0,0 +1,109 @@
+'''
+steam_library_setup/writer.py
+
+Writes .vdf files in one step, so Steam never sees half a file
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import hashlib
+import os
+import stat
+import tempfile
+import vdf
+
+from steam_library_setup import trace
+
+# Steam writes its files as UTF-8. Bytes that aren't valid UTF-8 are carried
+# through as surrogates, so reading and writing a file gives back the same bytes.
+ENCODING = 'utf-8'
+ENCODING_ERRORS = 'surrogateescape'
+
+_HASH_CHUNK_SIZE = 1048576
+
+
+def serializeVdf(obj):
+    return vdf.dumps(obj, pretty=True).encode(ENCODING, ENCODING_ERRORS)
+
+
+def fileMatches(path, data):
+    # True if the file at path holds exactly data
+    try:
+        trace.count('files_stated')
+        if os.path.getsize(path) != len(data):
+            return False
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f_in:
+            for chunk in iter(lambda: f_in.read(_HASH_CHUNK_SIZE), b''):
+                trace.count('bytes_read', len(chunk))
+                digest.update(chunk)
+    except OSError:
+        return False
+
+    return digest.digest() == hashlib.sha256(data).digest()
+
+
+def backupFile(path, backup_path):
+    '''
+    Keeps the current file at path as backup_path. The file is hardlinked,
+    which works because replaceFile() puts a new file in place instead of
+    writing into the old one. If links aren't supported, the file is moved.
+    '''
+    if os.path.lexists(backup_path):
+        os.unlink(backup_path)
+
+    try:
+        os.link(path, backup_path)
+    except (OSError, NotImplementedError):
+        os.replace(path, backup_path)
+
+
+def replaceFile(path, data):
+    '''
+    Writes data to a temporary file next to path, flushes it to disk and
+    renames it over path.
+    '''
+    folder, name = os.path.split(path)
+    fd, temp_path = tempfile.mkstemp(prefix='.' + name + '.', suffix='.tmp', dir=folder or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f_out:
+            f_out.write(data)
+            trace.count('bytes_written', len(data))
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        os.chmod(temp_path, _fileMode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    _syncFolder(folder)
+
+
+def _fileMode(path):
+    # Temporary files are private, the new file gets the permissions of the old one
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _syncFolder(folder):
+    # Makes the rename itself stick. Folders can't be opened like this on Windows.
+    try:
+        fd = os.open(folder or '.', os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
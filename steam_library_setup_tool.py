@@ -6,438 +6,313 @@ Small tool to add additional library folders to Steam
 Copyright (c) 2018 by LostDragonist
 Distributed under the MIT License
 '''
-import collections
 import os
-import re
+import queue
 import tkinter as tk
 import tkinter.filedialog as filedialog
 import tkinter.messagebox as messagebox
-import vdf
-import winreg
-import random
-
-info_t = collections.namedtuple("info_t", ("key", "value"))
+import tkinter.ttk as ttk
+from steam_library_setup import LibraryListModel, LibraryLoader, LibrarySetupError, trace
 
 
 class SteamLibrarySetupTool(tk.Frame):
 
-    COL_ENTRY = 0
-    COL_PATH = 1
-    COL_BROWSE = 2
-    COL_DELETE = 3
-    COL_NEW = 3
     COL_ACCEPT = 0
+    COL_BROWSE = 1
+    COL_DELETE = 2
+    COL_NEW = 3
     COL_CANCEL = 0
+    COL_SCROLL = 4
+
+    VISIBLE_ROWS = 15
+    # How often the loader is checked on, in milliseconds
+    POLL_INTERVAL = 50
 
     def __init__(self, master=None):
         # Initialize tkinter
         tk.Frame.__init__(self, master)
 
-        # Try to read the registry for the location of Steam
-        try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, "Software\\Valve\\Steam") as key:
-                value = winreg.QueryValueEx(key, "SteamExe")
-                self.steam_path = value[0].replace("/", "\\")
-        except:
-            self.steam_path = ''
-
-        # Prompt user for location of steam.exe if the registry wasn't useful
-        if self.steam_path == '' or not os.path.exists(self.steam_path):
-            dialog = filedialog.Open(self, defaultextension='.exe', initialdir=os.path.join("C:\\", "Program Files (x86)", "Steam"),
-                                     initialfile="Steam.exe", title="Select Steam.exe", filetypes=(("Steam", "Steam.exe"),))
-            self.steam_path = dialog.show().replace("/", "\\")
-
-        if self.steam_path == '':
-            messagebox.showerror("Error", "Could not find Steam.exe")
-            raise ValueError("Could not find steam.exe")
-
-        # Make sure libraryfolders.vdf exists where we think it should
-        self.config_library_vdf = os.path.join(os.path.split(
-            self.steam_path)[0], "config", "libraryfolders.vdf")
-        self.steamapps_library_vdf = os.path.join(os.path.split(
-            self.steam_path)[0], "steamapps", "libraryfolders.vdf")
-
-        # Read library info
-        self.new_config = {}
-        self.used_contentids = []
-        self.createLibraryInfo()
-        self.parseLibraryInfo()
-
-        # One of the library folders should be the Steam path
-        # This can't really be deleted or modified so remove it for now
-        # and add it back in later
-        self.steam_library = None
+        self.setup = None
+        self.steam_path = None
         self.steam_library_key = None
-        for key in self.new_config['libraryfolders']:
-            if self._isint(key):
-                if (self.new_config['libraryfolders'][key]['path'].lower() ==
-                        os.path.dirname(self.steam_path).lower()):
-                    self.steam_library_key = key
-                    self.steam_library = self.new_config['libraryfolders'][self.steam_library_key]
-                    break
-
-        if self.steam_library_key is not None:
-            del self.new_config['libraryfolders'][self.steam_library_key]
-
-        # Initialize GUI stuff
-        self.deleteRowButtons = []
-        self.browseRowButtons = []
-        self.entryLabels = []
-        self.entryWidgets = []
-
-        self.entryValues = [tk.StringVar()]
-        try:
-            self.entryValues[0].set(self.steam_library['path'])
-        except TypeError:
-            messagebox.showerror("Error", "Steam doesn't have a library for its own install?! Try restarting Steam?")
-            raise TypeError("Steam doesn't have a library for its own install?! Try restarting Steam?")
-        for key in self.new_config['libraryfolders']:
-            if self._isint(key):
-                self.entryValues.append(tk.StringVar())
-                self.entryValues[-1].set(self.new_config['libraryfolders']
-                                         [key]['path'].replace("\\\\", "\\"))
-
-        self.grid()
+        self.model = LibraryListModel()
+        self.editing = None
+        self.loading = True
+
+        self.grid(sticky=tk.N+tk.E+tk.S+tk.W)
+        self.master.rowconfigure(0, weight=1)
+        self.master.columnconfigure(0, weight=1)
         self.createWidgets()
 
-    def _isint(self, val):
-        retval = None
+        # Finding Steam and reading its files happens on a worker thread, so the
+        # window shows up right away. Dialogs stay on this thread.
+        self.loader = LibraryLoader(confirm=messagebox.askyesno)
+        self.loader.start()
+        self.after(SteamLibrarySetupTool.POLL_INTERVAL, self.pollLoader)
+
+    def pollLoader(self):
         try:
-            retval = int(val)
-        except:
+            while True:
+                kind, value = self.loader.queue.get_nowait()
+
+                if kind == 'progress':
+                    step, steps, text = value
+                    self.statusText.set(text + "...")
+                    self.progressBar.configure(value=100.0 * step / steps)
+
+                elif kind == 'need_steam_path':
+                    # Prompt user for location of steam.exe if the registry wasn't useful
+                    dialog = filedialog.Open(self, defaultextension='.exe', initialdir=os.path.join("C:\\", "Program Files (x86)", "Steam"),
+                                             initialfile="Steam.exe", title="Select Steam.exe", filetypes=(("Steam", "Steam.exe"),))
+                    self.loader.resume(dialog.show().replace("/", "\\"))
+
+                elif kind == 'loaded':
+                    self.librariesLoaded(value)
+                    return
+
+                elif kind == 'error':
+                    messagebox.showerror("Error", value)
+                    self.quit()
+                    return
+
+                elif kind == 'cancelled':
+                    return
+        except queue.Empty:
             pass
-        return retval is not None
 
-    def createLibraryInfo(self):
-        self.new_config = dict()
-        self.new_config['libraryfolders'] = dict()
+        self.after(SteamLibrarySetupTool.POLL_INTERVAL, self.pollLoader)
+
+    def librariesLoaded(self, setup):
+        if setup.steam_library is None:
+            messagebox.showerror("Error", "Steam doesn't have a library for its own install?! Try restarting Steam?")
+            self.quit()
+            return
+
+        self.setup = setup
+        self.steam_path = setup.steam_path
+        self.steam_library_key = setup.steam_library_key
+
+        # The Steam library comes first and stays as it is
+        self.model = LibraryListModel(self.setup.libraryPaths(), fixed=1 if self.steam_library_key is not None else 0)
+        for row_id, path in self.model:
+            self.tree.insert('', tk.END, iid=row_id, values=(path,),
+                             tags=('fixed',) if self.model.isFixed(row_id) else ())
+
+        self.loading = False
+        self.statusLabel.grid_remove()
+        self.progressBar.grid_remove()
+        self.updateButtons()
+
+    def acceptEvent(self):
+        self.finishEdit()
+        listed_libraries = self.model.listedLibraries()
 
-    def parseLibraryInfo(self):
-        if os.path.exists(self.config_library_vdf):
-            info = vdf.load(open(self.config_library_vdf, 'r'))
-        elif os.path.exists(self.steamapps_library_vdf):
-            info = vdf.load(open(self.steamapps_library_vdf, 'r'))
-        else:
-            messagebox.showerror("Error", "Could not find a libraryfolders.vdf file.")
-            raise ValueError("Could not find a libraryfolders.vdf file.")
-
-        root = list(info.keys())[0]
-        for key in info[root]:
-            if self._isint(key):
-                # If the value is a dict, must be new format
-                if isinstance(info[root][key], dict):
-                    self.new_config['libraryfolders'][key] = info[root][key]
-                    self.new_config['libraryfolders'][key]['mounted'] = '1'
-                    self.used_contentids.append(
-                        self.new_config['libraryfolders'][key]['contentid'])
-
-                # Old format is just a string
-                elif isinstance(info[root][key], str):
-                    # Create new info for the library
-                    self.new_config['libraryfolders'][key] = dict()
-                    self.new_config['libraryfolders'][key]['path'] = info[root][key]
-                    self.new_config['libraryfolders'][key]['label'] = ''
-                    self.new_config['libraryfolders'][key]['contentid'] = ''
-                    self.new_config['libraryfolders'][key]['totalsize'] = '0'
-                    self.new_config['libraryfolders'][key]['mounted'] = '1'
-                    self.new_config['libraryfolders'][key]['apps'] = dict()
-
-                # WTF
-                else:
-                    messagebox.showerror("Error", "Unknown file format")
-                    raise ValueError("Unknown file format")
-
-            else:
-                if key.lower() == 'contentstatsid':
-                    self.used_contentids.append(info[root][key])
-
-                self.new_config['libraryfolders'][key] = info[root][key]
-
-    def finalizeLibraryInfo(self):
-        # To "finalize" the library info, we need to fill out any missing entries.
-        for key in self.new_config['libraryfolders']:
-            if self._isint(key):
-                if self.new_config['libraryfolders'][key]['contentid'] == '':
-                    # First try to find a libraryfolder.vdf in the specified path
-                    library_vdf_path = os.path.join(
-                        self.new_config['libraryfolders'][key]['path'], 'libraryfolder.vdf')
-                    if os.path.exists(library_vdf_path):
-                        info = vdf.load(open(library_vdf_path, 'r'))
-                        root = list(info.keys())[0]
-                        for subkey in info[root]:
-                            if subkey == 'contentid':
-                                self.new_config['libraryfolders'][key]['contentid'] = info[root]['contentid']
-                                self.used_contentids.append(
-                                    info[root]['contentid'])
-                            elif subkey == 'label':
-                                self.new_config['libraryfolders'][key]['label'] = info[root]['label']
-
-                # Check again as there might not have been a libraryfolder.vdf or it didn't have a valid ContentID
-                if self.new_config['libraryfolders'][key]['contentid'] == '':
-                    # Create a random unused number and use that
-                    candidate = None
-                    while candidate is None or candidate in self.used_contentids:
-                        candidate = str(random.randint(1, 10000000000))
-                    self.new_config['libraryfolders'][key]['contentid'] = candidate
-                    self.used_contentids.append(candidate)
-
-    def writeLibraryInfo(self):
-        # Make sure directories all exist
-        for key in self.new_config['libraryfolders']:
-            if self._isint(key):
-                folder = os.path.join(
-                    self.new_config['libraryfolders'][key]['path'], 'steamapps')
-                if not os.path.exists(folder):
-                    if messagebox.askyesno("Create folders?", "Do you want to create the directory \"{}\"?".format(folder)):
-                        try:
-                            os.makedirs(folder, exist_ok=True)
-                        except:
-                            messagebox.showerror(
-                                "Error", "Error when creating directories")
-                            raise
-
-        # Create backups
-        try:
-            for f_path in [self.config_library_vdf, self.steamapps_library_vdf]:
-                if not os.path.exists(f_path):
-                    continue
-
-                with open(f_path, 'r') as f_in:
-                    with open(f_path + '.bak', 'w') as f_out:
-                        f_out.write(f_in.read())
-        except:
-            if not messagebox.askyesno("Warning", "Failed to create a backup. Proceed anyways?"):
-                raise
-
-        # Write the new files
-        restore_backup = False
         try:
-            vdf.dump(self.new_config, open(
-                self.config_library_vdf, 'w'), pretty=True)
-            vdf.dump(self.new_config, open(
-                self.steamapps_library_vdf, 'w'), pretty=True)
-        except:
-            restore_backup = True
-
-        # Restore the backup if needed
-        if restore_backup:
-            messagebox.showerror(
-                "Error", "Failed to write libraryfolders.vdf. Restoring backup...")
-            try:
-                for f_path in [self.config_library_vdf, self.steamapps_library_vdf]:
-                    with open(f_path + '.bak', 'r') as f_in:
-                        with open(f_path, 'w') as f_out:
-                            f_out.write(f_in.read())
-            except:
-                messagebox.showerror(
-                    "Error", "Failed to restore backup! Sorry about that.")
-                raise
+            added, removed = self.setup.applyLibraries(listed_libraries)
+            for library in removed:
+                print("deleting folder: {}".format(library))
+            for library in added:
+                print("adding folder: {}".format(library))
+
+            # Write the library info
+            self.setup.finalizeLibraryInfo()
+            self.setup.writeLibraryInfo()
+        except LibrarySetupError as e:
+            messagebox.showerror("Error", str(e))
+            raise
 
         # Tell the user stuff is done
         messagebox.showinfo(
             "Complete", "Steam Library Setup is done. Closing program...")
         self.quit()
 
-    def acceptEvent(self):
-        listed_libraries = []
-
-        # Parse the new directories list
-        for i, entry in enumerate(self.entryValues):
-            # Skip the base Steam directory
-            if self.steam_library_key is not None and i == 0:
-                continue
-
-            # Skip empty rows
-            value = entry.get()
-            if not value:
-                continue
-
-            listed_libraries.append(value)
-
-
-        # See if any libraries need to be deleted
-        something_to_delete = True
-        while something_to_delete:
-            for key in self.new_config['libraryfolders']:
-                if self._isint(key):
-                    for library in listed_libraries:
-                        if self.new_config['libraryfolders'][key]['path'].lower() == library.lower():
-                            break
-                    else:
-                        print("deleting folder: {}".format(
-                            self.new_config['libraryfolders'][key]['path']))
-                        del self.new_config['libraryfolders'][key]
-                        break
-            else:
-                something_to_delete = False
-
-        # Add the original Steam library in if it's present (and it should be!)
-        if self.steam_library_key is not None:
-            # Make sure we're not killing something that already exists
-            if self.new_config['libraryfolders'].get(self.steam_library_key) is not None:
-                messagebox.showerror("Error", "Expected key {} to be unused!".format(self.steam_library_key))
-                raise ValueError("Expected key {} to be unused!".format(self.steam_library_key))
-            self.new_config['libraryfolders'][self.steam_library_key] = self.steam_library
-
-        # See if there are new libraries
-        for library in listed_libraries:
-            new_entry = False
-            for key in self.new_config['libraryfolders']:
-                if self._isint(key) and self.new_config['libraryfolders'][key]['path'].lower() == library.lower():
-                    break
-            else:
-                print("adding folder: {}".format(library))
-                new_entry = True
-
-            if new_entry:
-                # Find the first index available
-                new_index = 1
-                while str(new_index) in self.new_config['libraryfolders']:
-                    new_index += 1
-                new_index = str(new_index)
-
-                self.new_config['libraryfolders'][new_index] = dict()
-                self.new_config['libraryfolders'][new_index]['path'] = library
-                self.new_config['libraryfolders'][new_index]['label'] = ''
-                self.new_config['libraryfolders'][new_index]['contentid'] = ''
-                self.new_config['libraryfolders'][new_index]['totalsize'] = '0'
-                self.new_config['libraryfolders'][new_index]['mounted'] = '1'
-                self.new_config['libraryfolders'][new_index]['apps'] = dict()
-
-        # Write the library info
-        self.finalizeLibraryInfo()
-        self.writeLibraryInfo()
-
     def cancelEvent(self):
-        if messagebox.askyesno("Cancel", "Cancel all pending changes and quit?"):
+        if self.loading:
+            # Nothing has been changed yet
+            self.loader.cancel()
+            self.quit()
+        elif messagebox.askyesno("Cancel", "Cancel all pending changes and quit?"):
             self.quit()
 
     def createWidgets(self):
-        # Create some headers
-        label_header_entry = tk.Label(self, text="Entry")
-        label_header_entry.grid(row=0, column=0)
-        label_header_path = tk.Label(self, text="Path")
-        label_header_path.grid(row=0, column=1)
-
-        # Create the rows for each entry
-        # i+1 due to header row
-        for i, entry_var in enumerate(self.entryValues):
-            self.entryLabels.append(tk.Label(self, text=str(i)))
-            self.entryLabels[-1].grid(row=i+1, column=0)
-
-            # i == 0 as the base Steam directory can not be modified
-            self.entryWidgets.append(tk.Entry(
-                self, textvariable=entry_var, state=tk.DISABLED if self.steam_library_key is not None and i == 0 else tk.NORMAL, width=100))
-            #self.entryWidgets.append( tk.Entry( self, textvariable=entry_var, state=tk.DISABLED, width=100 ) )
-            self.entryWidgets[-1].grid(row=i+1, column=1)
-
-            # i > 0 as the first row is the base Steam directory and can not be modified
-            if self.steam_library_key is not None and i > 0:
-                self.browseRowButtons.append(
-                    tk.Button(self, text="Browse...", command=lambda row=i: self.browseRow(row)))
-                self.browseRowButtons[-1].grid(row=i+1,
-                                               column=SteamLibrarySetupTool.COL_BROWSE)
-
-                self.deleteRowButtons.append(
-                    tk.Button(self, text="Delete Row", command=lambda row=i: self.deleteRow(row)))
-                self.deleteRowButtons[-1].grid(row=i+1,
-                                               column=SteamLibrarySetupTool.COL_DELETE)
+        # Every library is an item of one Treeview instead of a row of widgets, so
+        # adding or deleting one doesn't touch the others. One Entry is moved
+        # over the row being edited.
+        self.tree = ttk.Treeview(self, columns=('path',), show='headings', selectmode='browse',
+                                 height=SteamLibrarySetupTool.VISIBLE_ROWS)
+        self.tree.heading('path', text="Path")
+        self.tree.column('path', width=700)
+        self.tree.tag_configure('fixed', foreground='gray')
+        self.tree.grid(row=0, column=0, columnspan=SteamLibrarySetupTool.COL_SCROLL, sticky=tk.N+tk.E+tk.S+tk.W)
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.scrollbar.grid(row=0, column=SteamLibrarySetupTool.COL_SCROLL, sticky=tk.N+tk.S)
+        self.tree.configure(yscrollcommand=self.scrolled)
+
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(SteamLibrarySetupTool.COL_BROWSE, weight=1)
+
+        self.tree.bind('<Double-1>', self.doubleClickEvent)
+        self.tree.bind('<Return>', lambda event: self.editRow(self.selectedRow()))
+        self.tree.bind('<F2>', lambda event: self.editRow(self.selectedRow()))
+        self.tree.bind('<Delete>', lambda event: self.deleteRow(self.selectedRow()))
+        self.tree.bind('<<TreeviewSelect>>', lambda event: self.updateButtons())
+        self.tree.bind('<Configure>', lambda event: self.placeEditor())
+
+        self.editorValue = tk.StringVar()
+        self.editor = tk.Entry(self, textvariable=self.editorValue)
+        self.editor.bind('<Return>', lambda event: self.finishEdit())
+        self.editor.bind('<Escape>', lambda event: self.finishEdit(save=False))
+        self.editor.bind('<FocusOut>', lambda event: self.finishEdit())
 
         # Create the general buttons
         self.acceptButton = tk.Button(
             self, text="Accept", command=self.acceptEvent)
-        self.acceptButton.grid(row=len(
-            self.entryValues)+1, column=SteamLibrarySetupTool.COL_ACCEPT, sticky=tk.N+tk.E+tk.S+tk.W)
+        self.acceptButton.grid(row=1, column=SteamLibrarySetupTool.COL_ACCEPT, sticky=tk.N+tk.E+tk.S+tk.W)
+
+        self.browseButton = tk.Button(
+            self, text="Browse...", command=lambda: self.browseRow(self.selectedRow()))
+        self.browseButton.grid(row=1, column=SteamLibrarySetupTool.COL_BROWSE, sticky=tk.N+tk.S+tk.E)
+
+        self.deleteButton = tk.Button(
+            self, text="Delete Row", command=lambda: self.deleteRow(self.selectedRow()))
+        self.deleteButton.grid(row=1, column=SteamLibrarySetupTool.COL_DELETE, sticky=tk.N+tk.E+tk.S+tk.W)
 
         self.newRowButton = tk.Button(
             self, text="Add Row", command=self.addRow)
-        self.newRowButton.grid(row=len(
-            self.entryValues)+1, column=SteamLibrarySetupTool.COL_NEW, sticky=tk.N+tk.E+tk.S+tk.W)
+        self.newRowButton.grid(row=1, column=SteamLibrarySetupTool.COL_NEW, sticky=tk.N+tk.E+tk.S+tk.W)
 
         self.cancelButton = tk.Button(
             self, text="Cancel", command=self.cancelEvent)
-        self.cancelButton.grid(row=len(
-            self.entryValues)+2, column=SteamLibrarySetupTool.COL_CANCEL, sticky=tk.N+tk.E+tk.S+tk.W)
+        self.cancelButton.grid(row=2, column=SteamLibrarySetupTool.COL_CANCEL, sticky=tk.N+tk.E+tk.S+tk.W)
+
+        # Shown until the libraries are loaded
+        self.statusText = tk.StringVar(value="Loading...")
+        self.statusLabel = tk.Label(self, textvariable=self.statusText, anchor=tk.W)
+        self.statusLabel.grid(row=2, column=SteamLibrarySetupTool.COL_BROWSE, sticky=tk.E+tk.W)
+        self.progressBar = ttk.Progressbar(self, orient=tk.HORIZONTAL, mode='determinate', maximum=100)
+        self.progressBar.grid(row=2, column=SteamLibrarySetupTool.COL_DELETE,
+                              columnspan=SteamLibrarySetupTool.COL_SCROLL - SteamLibrarySetupTool.COL_DELETE,
+                              sticky=tk.E+tk.W)
+
+        self.updateButtons()
+
+    def selectedRow(self):
+        selection = self.tree.selection()
+        return selection[0] if selection else None
+
+    def editable(self, row_id):
+        return row_id is not None and row_id in self.model and not self.model.isFixed(row_id)
+
+    def updateButtons(self):
+        # Browse and Delete work on the selected row, which can't be the Steam library
+        state = tk.NORMAL if self.editable(self.selectedRow()) else tk.DISABLED
+        self.browseButton.configure(state=state)
+        self.deleteButton.configure(state=state)
+
+        # Nothing can be added or saved until the libraries are loaded
+        state = tk.DISABLED if self.loading else tk.NORMAL
+        self.acceptButton.configure(state=state)
+        self.newRowButton.configure(state=state)
+
+    def setRow(self, row_id, path):
+        self.model.set(row_id, path)
+        self.tree.item(row_id, values=(path,))
 
     def addRow(self):
-        # Create a new row
-        self.entryValues.append(tk.StringVar())
-        i = len(self.entryValues)
-        self.entryLabels.append(tk.Label(self, text=str(i-1)))
-        self.entryLabels[-1].grid(row=i, column=0)
-
-        self.entryWidgets.append(
-            tk.Entry(self, textvariable=self.entryValues[-1], width=100))
-        self.entryWidgets[-1].grid(row=i, column=1)
-
-        self.browseRowButtons.append(
-            tk.Button(self, text="Browse...", command=lambda row=i-1: self.browseRow(row)))
-        self.browseRowButtons[-1].grid(
-            row=i, column=SteamLibrarySetupTool.COL_BROWSE, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        self.deleteRowButtons.append(tk.Button(
-            self, text="Delete Row", command=lambda row=i-1: self.deleteRow(row)))
-        self.deleteRowButtons[-1].grid(
-            row=i, column=SteamLibrarySetupTool.COL_DELETE, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        # Relocate the general buttons
-        self.acceptButton.grid_remove()
-        self.acceptButton.grid(
-            row=i+1, column=SteamLibrarySetupTool.COL_ACCEPT, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        self.newRowButton.grid_remove()
-        self.newRowButton.grid(
-            row=i+1, column=SteamLibrarySetupTool.COL_NEW, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        self.cancelButton.grid_remove()
-        self.cancelButton.grid(
-            row=i+2, column=SteamLibrarySetupTool.COL_CANCEL, sticky=tk.N+tk.E+tk.S+tk.W)
-
-    def deleteRow(self, row_to_delete):
-        # Shift the contents from x to N
-        for row in range(row_to_delete, len(self.entryValues)):
-            if row+1 < len(self.entryValues):
-                self.entryValues[row].set(self.entryValues[row+1].get())
-        self.entryValues.pop()
-
-        # Remove the row
-        self.entryLabels[-1].grid_remove()
-        self.entryLabels.pop()
-
-        self.entryWidgets[-1].grid_remove()
-        self.entryWidgets.pop()
-
-        self.browseRowButtons[-1].grid_remove()
-        self.browseRowButtons.pop()
-
-        self.deleteRowButtons[-1].grid_remove()
-        self.deleteRowButtons.pop()
-
-        # Relocate the general buttons
-        self.acceptButton.grid_remove()
-        self.acceptButton.grid(
-            row=row+1, column=SteamLibrarySetupTool.COL_ACCEPT, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        self.newRowButton.grid_remove()
-        self.newRowButton.grid(
-            row=row+1, column=SteamLibrarySetupTool.COL_NEW, sticky=tk.N+tk.E+tk.S+tk.W)
-
-        self.cancelButton.grid_remove()
-        self.cancelButton.grid(
-            row=row+3, column=SteamLibrarySetupTool.COL_CANCEL, sticky=tk.N+tk.E+tk.S+tk.W)
-
-    def browseRow(self, row):
+        # Create a new row and start editing it
+        self.finishEdit()
+        row_id = self.model.append()
+        self.tree.insert('', tk.END, iid=row_id, values=('',))
+        self.tree.selection_set(row_id)
+        self.editRow(row_id)
+
+    def deleteRow(self, row_id):
+        if not self.editable(row_id):
+            return
+
+        if self.editing == row_id:
+            self.finishEdit(save=False)
+
+        # Keep a row selected, so Delete can be pressed again
+        neighbour = self.tree.next(row_id) or self.tree.prev(row_id)
+        self.model.remove(row_id)
+        self.tree.delete(row_id)
+        if neighbour:
+            self.tree.selection_set(neighbour)
+            self.tree.focus(neighbour)
+        self.updateButtons()
+
+    def doubleClickEvent(self, event):
+        row_id = self.tree.identify_row(event.y)
+        if row_id:
+            self.editRow(row_id)
+
+    def editRow(self, row_id):
+        if not self.editable(row_id):
+            return
+
+        self.finishEdit()
+        self.editing = row_id
+        self.editorValue.set(self.model.get(row_id))
+
+        # The row needs to be drawn before its position is known
+        self.tree.see(row_id)
+        self.tree.update_idletasks()
+        self.placeEditor()
+        self.editor.focus_set()
+        self.editor.select_range(0, tk.END)
+
+    def placeEditor(self):
+        # Keeps the editor over its row, or out of the way while the row is scrolled out of view
+        if self.editing is None:
+            return
+
+        bbox = self.tree.bbox(self.editing, 'path')
+        if bbox:
+            x, y, width, height = bbox
+            self.editor.place(in_=self.tree, x=x, y=y, width=width, height=height)
+        else:
+            self.editor.place_forget()
+
+    def scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        self.placeEditor()
+
+    def finishEdit(self, save=True):
+        if self.editing is None:
+            return
+
+        row_id, self.editing = self.editing, None
+        self.editor.place_forget()
+        if save:
+            self.setRow(row_id, self.editorValue.get())
+        self.tree.focus_set()
+
+    def browseRow(self, row_id):
+        if not self.editable(row_id):
+            return
+        self.finishEdit()
+
         # Open a dialog to find a directory
         new_path = filedialog.Directory(self).show()
+        if not new_path:
+            return
+
+        # Replace "/" with "\\" to keep things consistent
+        new_path = new_path.replace("/", "\\")
 
         # Remove "\\steamapps" if the user selected it
         if new_path.lower().endswith("\\steamapps"):
             new_path = os.path.split(new_path)[0]
 
-        # Replace "/" with "\\" to keep things consistent
-        self.entryValues[row].set(new_path.replace("/", "\\"))
-
+        self.setRow(row_id, new_path)
 
-app = SteamLibrarySetupTool()
-app.master.title("Steam Library Setup Tool")
-app.mainloop()
+if __name__ == '__main__':
+    trace.startTracingFromEnvironment()
+    try:
+        app = SteamLibrarySetupTool()
+        app.master.title("Steam Library Setup Tool")
+        app.mainloop()
+    finally:
+        trace.stopTracing()
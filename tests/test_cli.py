@@ -0,0 +1,111 @@
+'''
+tests/test_cli.py
+
+Tests for steam_library_setup/cli.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import json
+import unittest
+from unittest import mock
+
+import vdf
+from steam_library_setup import cli, mover, trace
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.steam = os.path.join(self.root, 'steam')
+        self.libraries = [os.path.join(self.root, name) for name in ('lib1', 'lib2')]
+        for path in [self.steam] + self.libraries:
+            os.makedirs(os.path.join(path, 'steamapps'))
+        os.makedirs(os.path.join(self.steam, 'config'))
+
+        folders = dict((str(i), {'path': path, 'label': '', 'contentid': str(i + 1), 'apps': {}})
+                       for i, path in enumerate([self.steam] + self.libraries))
+        self.vdf_path = os.path.join(self.steam, 'config', 'libraryfolders.vdf')
+        with open(self.vdf_path, 'w') as f_out:
+            vdf.dump({'libraryfolders': folders}, f_out, pretty=True)
+
+    def runMain(self, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = cli.main(list(args))
+        return code, output.getvalue()
+
+    def libraryPaths(self):
+        with open(self.vdf_path) as f_in:
+            folders = vdf.load(f_in)['libraryfolders']
+        return [folders[key]['path'] for key in folders if key.isdigit()]
+
+    def testNoLibraryListKeepsLibraries(self):
+        code, output = self.runMain(self.steam, '--scan-apps', '-n')
+        self.assertEqual(code, 0)
+        self.assertIn("0 added, 0 removed", output)
+
+        code, output = self.runMain(self.steam, '--scan-apps', '-y')
+        self.assertEqual(code, 0)
+        self.assertEqual(self.libraryPaths(), [self.steam] + self.libraries)
+
+    def testLibraryListIsApplied(self):
+        code, output = self.runMain(self.steam, '-l', self.libraries[0], '-y')
+        self.assertEqual(code, 0)
+        self.assertIn("0 added, 1 removed", output)
+        self.assertEqual(self.libraryPaths(), [self.steam, self.libraries[0]])
+
+    def libraryApps(self):
+        with open(self.vdf_path) as f_in:
+            folders = vdf.load(f_in)['libraryfolders']
+        return [folders[key]['apps'] for key in folders if key.isdigit()]
+
+    def testInterruptedMoveIsResumed(self):
+        source, destination = self.libraries
+        with open(os.path.join(source, 'steamapps', 'appmanifest_10.acf'), 'w') as f_out:
+            vdf.dump({'AppState': {'appid': '10', 'name': 'Game', 'installdir': 'Game', 'SizeOnDisk': '5'}},
+                     f_out, pretty=True)
+        os.makedirs(os.path.join(source, 'steamapps', 'common', 'Game'))
+        with open(os.path.join(source, 'steamapps', 'common', 'Game', 'game.exe'), 'w') as f_out:
+            f_out.write('12345')
+        journal = mover.journalPath(destination, '10')
+        with open(journal, 'w') as f_out:
+            json.dump({'appid': '10', 'installdir': 'Game', 'manifest': 'appmanifest_10.acf',
+                       'source': source, 'destination': destination, 'state': 'copy'}, f_out)
+
+        code, output = self.runMain(self.steam, '--scan-apps', '-n')
+        self.assertEqual(code, 0)
+        self.assertIn("  ! {}: unfinished move".format(journal), output)
+
+        code, output = self.runMain(self.steam, '--resume-moves', '-y')
+        self.assertEqual(code, 0)
+        self.assertIn("  > 10 from {} to {}: copied 1 files".format(source, destination), output)
+        self.assertFalse(os.path.exists(journal))
+        self.assertFalse(os.path.exists(os.path.join(source, 'steamapps', 'common', 'Game')))
+        with open(os.path.join(destination, 'steamapps', 'common', 'Game', 'game.exe')) as f_in:
+            self.assertEqual(f_in.read(), '12345')
+        self.assertEqual(self.libraryApps(), [{}, {}, {'10': '5'}])
+
+    def testTraceWrittenWhenInterrupted(self):
+        trace_path = os.path.join(self.root, 'trace.json')
+        with mock.patch.object(cli, 'reconcileInstall', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.runMain(self.steam, '--trace', trace_path)
+
+        self.assertFalse(trace.enabled())
+        with open(trace_path) as f_in:
+            spans = json.load(f_in)['spans']
+        self.assertEqual([span['name'] for span in spans], ['reconcileInstall'])
+        self.assertEqual(spans[0]['error'], 'KeyboardInterrupt: ')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+'''
+tests/test_daemon.py
+
+Tests for steam_library_setup/daemon.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import vdf
+from steam_library_setup import daemon
+
+
+class LibraryDaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.steam = os.path.join(self.root, 'steam')
+        self.library = os.path.join(self.root, 'library')
+        for path in (self.steam, self.library):
+            os.makedirs(os.path.join(path, 'steamapps'))
+        os.makedirs(os.path.join(self.steam, 'config'))
+
+        folders = {'0': {'path': self.steam, 'contentid': '1', 'apps': {}},
+                   '1': {'path': self.library, 'contentid': '2', 'apps': {}}}
+        with open(os.path.join(self.steam, 'config', 'libraryfolders.vdf'), 'w') as f_out:
+            vdf.dump({'libraryfolders': folders}, f_out, pretty=True)
+
+        self.manifest = os.path.join(self.library, 'steamapps', 'appmanifest_10.acf')
+        self.writeManifest()
+
+    def writeManifest(self, text=None):
+        with open(self.manifest, 'w') as f_out:
+            if text is None:
+                vdf.dump({'AppState': {'appid': '10', 'name': 'Game', 'installdir': 'Game'}}, f_out, pretty=True)
+            else:
+                f_out.write(text)
+
+    def makeDaemon(self):
+        return daemon.LibraryDaemon(os.path.join(self.steam, 'steam.exe'), use_inotify=False)
+
+    def testConfigWatchedBeforeItIsRead(self):
+        watched = []
+
+        def loadConfig(library_daemon):
+            watched.append(sorted(library_daemon.watcher.listings))
+
+        with mock.patch.object(daemon.LibraryDaemon, 'loadConfig', autospec=True, side_effect=loadConfig):
+            library_daemon = self.makeDaemon()
+        self.assertEqual(watched, [sorted(library_daemon.config_folders)])
+
+    def testRescanReportsManifestErrors(self):
+        library_daemon = self.makeDaemon()
+        self.assertEqual(list(library_daemon.apps[self.library]), ['appmanifest_10.acf'])
+
+        self.writeManifest('')
+        library_daemon.rescanLibrary(self.library)
+        self.assertEqual(library_daemon.apps[self.library], {})
+        self.assertIn(self.manifest, library_daemon.query({'query': 'status'})['errors'])
+
+        self.writeManifest()
+        library_daemon.rescanLibrary(self.library)
+        self.assertEqual(list(library_daemon.apps[self.library]), ['appmanifest_10.acf'])
+        self.assertEqual(library_daemon.query({'query': 'status'})['errors'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+'''
+tests/test_duplicates.py
+
+Tests for steam_library_setup/duplicates.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from steam_library_setup import duplicates
+from steam_library_setup.manifests import AppManifest
+
+_scandir = os.scandir
+_stat = os.stat
+
+
+def zeroInode(st):
+    # What DirEntry.stat() and os.stat() give on Windows when they can't tell
+    return os.stat_result((st.st_mode, 0, 0, st.st_nlink, st.st_uid, st.st_gid, st.st_size,
+                           int(st.st_atime), int(st.st_mtime), int(st.st_ctime)))
+
+
+class ZeroInodeEntry(object):
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, follow_symlinks=True):
+        return self.entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self.entry.is_file(follow_symlinks=follow_symlinks)
+
+    def stat(self, follow_symlinks=True):
+        return zeroInode(self.entry.stat(follow_symlinks=follow_symlinks))
+
+
+class ZeroInodeScandir(object):
+
+    def __init__(self, path):
+        self.entries = _scandir(path)
+
+    def __iter__(self):
+        return (ZeroInodeEntry(entry) for entry in self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.entries.close()
+
+
+class CompareInstallsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def install(self, library, files):
+        folder = os.path.join(self.root, library, 'steamapps', 'common', 'Game')
+        os.makedirs(folder)
+        for name, data in files.items():
+            with open(os.path.join(folder, name), 'wb') as f_out:
+                f_out.write(data)
+
+        path = os.path.join(self.root, library, 'steamapps', 'appmanifest_10.acf')
+        return os.path.join(self.root, library), AppManifest('10', 'Game', 'Game', '0', '4', path)
+
+    def compare(self, copies):
+        with mock.patch.object(duplicates.os, 'scandir', ZeroInodeScandir), \
+                mock.patch.object(duplicates.os, 'stat', lambda *args, **kwargs: zeroInode(_stat(*args, **kwargs))), \
+                ThreadPoolExecutor() as executor:
+            return duplicates.compareInstalls(copies, executor=executor)
+
+    def testDifferentContentWithoutInodes(self):
+        copies = [self.install('a', {'data.bin': b'one'}), self.install('b', {'data.bin': b'two'})]
+        result = self.compare(copies)
+        self.assertEqual(result.content_mismatch, ['data.bin'])
+        self.assertFalse(result.identical)
+
+    def testSameContentWithoutInodes(self):
+        copies = [self.install('a', {'data.bin': b'same'}), self.install('b', {'data.bin': b'same'})]
+        result = self.compare(copies)
+        self.assertEqual(result.content_mismatch, [])
+        self.assertTrue(result.identical)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+'''
+tests/test_manifest_cache.py
+
+Tests for steam_library_setup/manifest_cache.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from steam_library_setup.manifest_cache import ManifestCache
+
+
+class SaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.path = os.path.join(self.root, 'cache.json')
+
+    def testInstallsSavingTogetherKeepEachOthersFolders(self):
+        # Loaded before either one saves, like installs set up in parallel
+        first = ManifestCache.load(self.path)
+        second = ManifestCache.load(self.path)
+        first.updateFolder('first', 1, {'a.acf': [1, 2]})
+        second.updateFolder('second', 2, {'b.acf': [3, 4]})
+        first.save()
+        second.save()
+
+        cache = ManifestCache.load(self.path)
+        self.assertEqual(cache.folder('first'), {'mtime_ns': 1, 'files': {'a.acf': [1, 2]}})
+        self.assertEqual(cache.folder('second'), {'mtime_ns': 2, 'files': {'b.acf': [3, 4]}})
+
+    def testUpdatedFolderReplacesTheSavedOne(self):
+        first = ManifestCache.load(self.path)
+        first.updateFolder('shared', 1, {})
+        first.save()
+
+        second = ManifestCache.load(self.path)
+        second.updateFolder('shared', 2, {})
+        second.save()
+        # Nothing new to write, so this doesn't put the old entry back
+        first.save()
+
+        self.assertEqual(ManifestCache.load(self.path).folder('shared'), {'mtime_ns': 2, 'files': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
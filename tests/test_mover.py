@@ -0,0 +1,109 @@
+'''
+tests/test_mover.py
+
+Tests for steam_library_setup/mover.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import errno
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from steam_library_setup import mover
+from steam_library_setup.manifests import AppManifest
+
+_write = os.write
+
+
+def shortWrite(fd, data):
+    # Writes at most 1000 bytes, like a pipe or a full disk might
+    return _write(fd, data[:1000])
+
+
+class CopyDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def testFallbackWritesEverything(self):
+        data = os.urandom(3 * 1048576 + 12345)
+        source = os.path.join(self.root, 'source')
+        destination = os.path.join(self.root, 'destination')
+        with open(source, 'wb') as f_out:
+            f_out.write(data)
+
+        unsupported = OSError(errno.EXDEV, "unsupported")
+        with mock.patch.object(os, 'copy_file_range', side_effect=unsupported, create=True), \
+                mock.patch.object(os, 'sendfile', side_effect=unsupported, create=True), \
+                mock.patch.object(os, 'write', side_effect=shortWrite):
+            with open(source, 'rb') as f_in, open(destination, 'wb') as f_out:
+                mover._copyData(f_in.fileno(), f_out.fileno(), len(data))
+
+        with open(destination, 'rb') as f_in:
+            self.assertEqual(f_in.read(), data)
+
+
+
+class MoveAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.source = os.path.join(self.root, 'source')
+        self.destination = os.path.join(self.root, 'destination')
+        self.source_dir = os.path.join(self.source, 'steamapps', 'common', 'Game')
+        self.destination_dir = os.path.join(self.destination, 'steamapps', 'common', 'Game')
+        os.makedirs(self.source_dir)
+        os.makedirs(os.path.join(self.destination, 'steamapps'))
+        for name in ('a.txt', 'b.txt'):
+            with open(os.path.join(self.source_dir, name), 'w') as f_out:
+                f_out.write(name)
+
+        manifest = os.path.join(self.source, 'steamapps', 'appmanifest_10.acf')
+        with open(manifest, 'w') as f_out:
+            f_out.write('"AppState"\n{\n\t"appid"\t\t"10"\n\t"installdir"\t\t"Game"\n}\n')
+        self.app = AppManifest('10', 'Game', 'Game', '6', '4', manifest)
+
+        # Moves between drives, whatever the test folder is on
+        patcher = mock.patch.object(mover, '_sameDevice', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testExistingFolderIsRefused(self):
+        os.makedirs(self.destination_dir)
+        with open(os.path.join(self.destination_dir, 'old.txt'), 'w') as f_out:
+            f_out.write('old')
+
+        with self.assertRaises(mover.MoveError):
+            mover.moveApp(self.app, self.source, self.destination, verify=False)
+
+        self.assertEqual(os.listdir(self.destination_dir), ['old.txt'])
+        self.assertEqual(sorted(os.listdir(self.source_dir)), ['a.txt', 'b.txt'])
+        self.assertFalse(os.path.exists(mover.journalPath(self.destination, '10')))
+
+    def testJournalIsResumed(self):
+        # Interrupted after a.txt was copied
+        os.makedirs(self.destination_dir)
+        shutil.copy2(os.path.join(self.source_dir, 'a.txt'), self.destination_dir)
+        with open(mover.journalPath(self.destination, '10'), 'w') as f_out:
+            json.dump({'appid': '10', 'installdir': 'Game', 'manifest': 'appmanifest_10.acf',
+                       'source': self.source, 'destination': self.destination, 'state': 'copy'}, f_out)
+
+        result = mover.moveApp(self.app, self.source, self.destination)
+
+        self.assertEqual((result.renamed, result.files, result.size), (False, 2, 10))
+        self.assertEqual(sorted(os.listdir(self.destination_dir)), ['a.txt', 'b.txt'])
+        self.assertTrue(os.path.exists(os.path.join(self.destination, 'steamapps', 'appmanifest_10.acf')))
+        self.assertFalse(os.path.exists(self.source_dir))
+        self.assertFalse(os.path.exists(mover.journalPath(self.destination, '10')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+'''
+tests/test_trace.py
+
+Tests for steam_library_setup/trace.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from steam_library_setup import trace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TraceTest(unittest.TestCase):
+
+    def testProfilersNotImportedWithCore(self):
+        code = ("import sys, steam_library_setup.core; "
+                "print(sorted(set(sys.modules).intersection(['cProfile', 'pstats', 'tracemalloc'])))")
+        output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, universal_newlines=True)
+        self.assertEqual(output.strip(), '[]')
+
+    def testProfiles(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, 'trace.json')
+
+        trace.startTracing(path, ['cprofile', 'tracemalloc'])
+        try:
+            with trace.span('work'):
+                sorted(range(1000), reverse=True)
+        finally:
+            trace.stopTracing()
+
+        with open(path) as f_in:
+            profile = json.load(f_in)['profile']
+        self.assertTrue(profile['cprofile'])
+        self.assertGreater(profile['tracemalloc']['peak'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+'''
+tests/test_vdict.py
+
+Tests for vdf/vdict.py
+
+Copyright (c) 2018 by LostDragonist
+Distributed under the MIT License
+'''
+import random
+import unittest
+
+from vdf import VDFDict
+
+
+class VDFDictDeleteTest(unittest.TestCase):
+
+    def testDeletesMatchAList(self):
+        rng = random.Random(5)
+        d = VDFDict()
+        pairs = []
+        for step in range(3000):
+            key = rng.choice('abc')
+            same = [i for i, (other, _) in enumerate(pairs) if other == key]
+            if same and rng.random() < 0.45:
+                idx = rng.randrange(len(same))
+                del d[(idx, key)]
+                del pairs[same[idx]]
+            else:
+                d[key] = step
+                pairs.append((key, step))
+
+            self.assertEqual(list(d.items()), pairs)
+            for key in 'abc':
+                values = [value for other, value in pairs if other == key]
+                self.assertEqual(d.get_all_for(key), values)
+                self.assertEqual([d[(idx, key)] for idx in range(len(values))], values)
+                self.assertNotIn((len(values), key), d)
+
+    def testDeleteFirstDuplicates(self):
+        d = VDFDict([('key', i) for i in range(1000)] + [('other', -1)])
+        for i in range(999):
+            self.assertEqual(d.pop((0, 'key')), i)
+            self.assertEqual(d[(0, 'key')], i + 1)
+            self.assertEqual(len(d.get_all_for('key')), 999 - i)
+        self.assertEqual(list(d.items()), [('key', 999), ('other', -1)])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
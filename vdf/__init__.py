@@ -6,9 +6,10 @@ __author__ = "Rossen Georgiev"
 
 import re
 import sys
+import mmap
+import fnmatch
 import struct
 from binascii import crc32
-from io import BytesIO
 from io import StringIO as unicodeIO
 
 try:
@@ -16,7 +17,7 @@ try:
 except:
     from collections import Mapping
 
-from vdf.vdict import VDFDict
+from vdf.vdict import VDFDict, FrozenVDFDict
 
 # Py2 & Py3 compatibility
 if sys.version_info[0] >= 3:
@@ -58,14 +59,39 @@ def _re_escape_match(m):
 def _re_unescape_match(m):
     return _unescape_char_map[m.group()]
 
+_re_escape = re.compile(r"[\n\t\v\b\r\f\a\\\?\"']")
+_re_unescape = re.compile(r"(\\n|\\t|\\v|\\b|\\r|\\f|\\a|\\\\|\\\?|\\\"|\\')")
+
+# most strings have nothing to escape, so check before substituting
 def _escape(text):
-    return re.sub(r"[\n\t\v\b\r\f\a\\\?\"']", _re_escape_match, text)
+    if _re_escape.search(text) is None:
+        return text
+    return _re_escape.sub(_re_escape_match, text)
 
 def _unescape(text):
-    return re.sub(r"(\\n|\\t|\\v|\\b|\\r|\\f|\\a|\\\\|\\\?|\\\"|\\')", _re_unescape_match, text)
+    if '\\' not in text:
+        return text
+    return _re_unescape.sub(_re_unescape_match, text)
 
 # parsing and dumping for KV1
-def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
+_re_keyvalue = re.compile(r'("(?P<qkey>(?:\\.|[^\\"])*)"|(?P<key>#?[a-z0-9\-\_\\\?$%<>]+))'
+                          r'([ \t]*('
+                          r'"(?P<qval>(?:\\.|[^\\"])*)(?P<vq_end>")?'
+                          r'|(?P<val>(?:(?<!/)/(?!/)|[a-z0-9\-\_\\\?\*\.$<> ])+)'
+                          r'|(?P<sblock>{[ \t]*)(?P<eblock>})?'
+                          r'))?',
+                          flags=re.I)
+_re_space = re.compile(r'\s*')
+# fast path for the most common statements: a quoted key with a quoted value or
+# with nothing else on the line. Everything else goes through _re_keyvalue
+_re_simple_keyvalue = re.compile(r'[ \t\r\n]*"([^"\\\n]*)"[ \t]*(?:"([^"\\\n]*)"[^\n]*|[ \t\r]*)\n')
+_keyvalue_groups = ('qkey', 'key', 'qval', 'vq_end', 'val', 'sblock', 'eblock')
+
+_LEX_CHUNK_SIZE = 65536
+
+PARSE_ENGINES = ('lexer', 'regex')
+
+def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True, engine='lexer'):
     """
     Deserialize ``s`` (a ``str`` or ``unicode`` instance containing a VDF)
     to a Python object.
@@ -77,15 +103,398 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``engine`` selects the parser implementation. ``lexer`` (the default) tokenizes
+    the input in a single pass. ``regex`` is the original line based parser, kept
+    as a fallback.
     """
     if not issubclass(mapper, Mapping):
         raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+
+    return _build_tree(iterparse(fp, escaped=escaped, engine=engine), mapper, merge_duplicate_keys)
+
+
+def iterparse(fp, escaped=True, engine='lexer'):
+    """
+    Incrementally parse ``fp`` (a file-like object containing a VDF) without
+    building any Python objects for the document.
+
+    Returns a generator of ``(event, key, value, depth, offset)`` tuples, where ``event``
+    is one of ``'start'`` (a block opens, ``value`` is ``None``), ``'value'`` (a key/value
+    pair) or ``'end'`` (a block closes, ``key`` is the key of the block). ``depth`` is the
+    nesting level of ``key``, starting from ``0``. ``offset`` is the position of the
+    statement in the character stream.
+
+    ``escaped`` and ``engine`` are the same as for ``parse()``
+    """
     if not hasattr(fp, 'readline'):
         raise TypeError("Expected fp to be a file-like object supporting line iteration")
 
+    if engine == 'lexer':
+        tokens = _lex(fp)
+    elif engine == 'regex':
+        tokens = _lex_regex(fp)
+    else:
+        raise ValueError("Expected engine to be one of %s, got %s" % (PARSE_ENGINES, repr(engine)))
+
+    return _iter_events(tokens, escaped)
+
+
+def _iter_events(tokens, escaped):
+    keys = []
+
+    for token, key, val, offset in tokens:
+        if token == _TOKEN_VALUE:
+            if escaped:
+                key = _unescape(key)
+                val = _unescape(val)
+            yield ('value', key, val, len(keys), offset)
+        elif token == _TOKEN_BLOCK_START:
+            if escaped:
+                key = _unescape(key)
+            yield ('start', key, None, len(keys), offset)
+            keys.append(key)
+        else:
+            key = keys.pop()
+            yield ('end', key, None, len(keys), offset)
+
+
+def _build_tree(events, mapper, merge_duplicate_keys):
+    if mapper is VDFDict or issubclass(mapper, FrozenVDFDict):
+        return _build_array_tree(events, mapper, merge_duplicate_keys)
+
     stack = [mapper()]
+
+    for event, key, val, _, _ in events:
+        # we've matched a simple keyvalue pair, map it to the last dict obj in the stack
+        if event == 'value':
+            stack[-1][key] = val
+
+        # we have a key with value in parenthesis, so we make a new dict obj (level deeper)
+        elif event == 'start':
+            if merge_duplicate_keys and key in stack[-1]:
+                _m = stack[-1][key]
+                # we've descended a level deeper, if value is str, we have to overwrite it to mapper
+                if not isinstance(_m, mapper):
+                    _m = stack[-1][key] = mapper()
+            else:
+                _m = mapper()
+                stack[-1][key] = _m
+
+            stack.append(_m)
+
+        # one level back
+        else:
+            stack.pop()
+
+    return stack.pop()
+
+
+def _build_array_tree(events, mapper, merge_duplicate_keys):
+    # fills the key and value lists of VDFDict/FrozenVDFDict directly. Merging works
+    # the same as VDFDict.__setitem__ would: a block is merged into the first entry
+    # with its key when that is a block, otherwise it is added as a duplicate.
+    keys = []
+    values = []
+    root = mapper._from_arrays(keys, values)
+    # each level is (keys, values, position of the first entry per key, level per block position)
+    stack = [(keys, values, {}, {})]
+
+    for event, key, val, _, _ in events:
+        if event == 'value':
+            keys, values, first, _ = stack[-1]
+            if merge_duplicate_keys and key not in first:
+                first[key] = len(keys)
+            keys.append(key)
+            values.append(val)
+
+        elif event == 'start':
+            keys, values, first, blocks = stack[-1]
+            pos = first.get(key) if merge_duplicate_keys else None
+
+            if pos is not None and pos in blocks:
+                stack.append(blocks[pos])
+                continue
+
+            if merge_duplicate_keys and pos is None:
+                first[key] = len(keys)
+
+            level = ([], [], {}, {})
+            blocks[len(keys)] = level
+            keys.append(key)
+            values.append(mapper._from_arrays(level[0], level[1]))
+            stack.append(level)
+
+        else:
+            stack.pop()
+
+    return root
+
+
+def select(fp, pattern, mapper=dict, merge_duplicate_keys=True, escaped=True):
+    """
+    Return a list with the values at ``pattern`` in ``fp`` (a file-like object
+    containing a VDF), in document order.
+
+    ``pattern`` is a ``/`` separated key path, where each part is matched against
+    keys like a glob (see ``fnmatch``) and case insensitively.
+    (e.g. ``libraryfolders/*/path`` or ``AppState/SizeOnDisk``)
+
+    Blocks that can't match are skipped by the lexer, and only matched keys and
+    values are unescaped. When the pattern ends at a block, the block is built
+    using ``mapper`` and ``merge_duplicate_keys``, the same as with ``parse()``.
+    """
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+    if not hasattr(fp, 'readline'):
+        raise TypeError("Expected fp to be a file-like object supporting line iteration")
+
+    return _select(_lex(fp), _compile_selector(pattern), mapper, merge_duplicate_keys,
+                   _unescape if escaped else None)
+
+
+def _compile_selector(pattern):
+    if not isinstance(pattern, string_type):
+        raise TypeError("Expected pattern to be a str, got %s" % type(pattern))
+
+    matchers = []
+
+    for part in pattern.strip('/').split('/'):
+        if part == '*':
+            matchers.append(lambda key: True)
+        elif any(c in part for c in '*?['):
+            matchers.append(re.compile(fnmatch.translate(part), re.I | re.S).match)
+        else:
+            matchers.append(lambda key, part=part.lower(): key.lower() == part)
+
+    return matchers
+
+
+def _select(tokens, matchers, mapper, merge_duplicate_keys, unescape):
+    # tokens are either lexer tokens or binary events, both start with the event name
+    results = []
+    last = len(matchers) - 1
+    depth = 0
+    skip = None
+
+    while True:
+        try:
+            token = tokens.send(skip)
+        except StopIteration:
+            break
+
+        skip = None
+        event, key = token[0], token[1]
+
+        if event == 'end':
+            depth -= 1
+            continue
+
+        if unescape is not None and '\\' in key:
+            key = unescape(key)
+
+        if not matchers[depth](key):
+            skip = event == 'start'
+        elif event == 'value':
+            if depth == last:
+                results.append(token[2] if unescape is None else unescape(token[2]))
+        elif depth == last:
+            results.append(_build_tree(_iter_subtree(tokens, unescape), mapper, merge_duplicate_keys))
+        else:
+            depth += 1
+
+    return results
+
+
+def _iter_subtree(tokens, unescape):
+    # events for the contents of the block that was just started, up to its end
+    depth = 0
+
+    for token in tokens:
+        event, key, val = token[0], token[1], token[2]
+
+        if event == 'end':
+            if depth == 0:
+                return
+            depth -= 1
+        else:
+            if event == 'start':
+                depth += 1
+            if unescape is not None:
+                key = unescape(key)
+                if event == 'value':
+                    val = unescape(val)
+
+        yield (event, key, val, None, None)
+
+
+# lexer tokens
+_TOKEN_BLOCK_START = 'start'
+_TOKEN_BLOCK_END = 'end'
+_TOKEN_VALUE = 'value'
+
+def _lex(fp, chunk_size=_LEX_CHUNK_SIZE):
+    """
+    Single pass tokenizer for text VDF. Yields ``(token, key, value, offset)`` tuples
+    with raw (still escaped) strings. ``offset`` is the position of the statement in
+    the character stream.
+
+    Input is read in chunks and scanned with a cursor. Statements keep the line
+    semantics of the regex parser: anything after a statement on the same line is
+    ignored. When a statement runs past the end of the buffer, the unconsumed tail
+    is kept and the next read is at least as large as the buffer, so long multi-line
+    values are rescanned only a logarithmic number of times.
+
+    Sending a true value in response to a block start token skips that block: no
+    tokens are produced for its contents or for its closing bracket.
+    """
+    read = getattr(fp, 'read', None) or (lambda size: fp.readline())
+    buf = ''
+    pos = 0
+    eof = False
+    base_offset = 0
+    base_lineno = 1
+
+    while buf == '' and not eof:
+        chunk = read(chunk_size)
+        eof = chunk == ''
+        buf = strip_bom(chunk)
+        base_offset += len(chunk) - len(buf)
+
+    depth = 0
+    skip_depth = -1
     expect_bracket = False
 
+    def error(msg, start):
+        nl = buf.find('\n', start)
+        lineno = base_lineno + buf.count('\n', 0, start)
+        raise SyntaxError(msg, (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0,
+                                buf[start:] if nl == -1 else buf[start:nl+1]))
+
+    while True:
+        if not expect_bracket:
+            match = _re_simple_keyvalue.match(buf, pos)
+
+            if match is not None:
+                key, val = match.groups()
+
+                if skip_depth >= 0:
+                    if val is None:
+                        depth += 1
+                        expect_bracket = True
+                elif val is None:
+                    if (yield (_TOKEN_BLOCK_START, key, None, base_offset + match.start(1) - 1)):
+                        skip_depth = depth
+                    depth += 1
+                    expect_bracket = True
+                else:
+                    yield (_TOKEN_VALUE, key, val, base_offset + match.start(1) - 1)
+
+                pos = match.end()
+                continue
+
+        start = _re_space.match(buf, pos).end()
+        need_more = start == len(buf)
+
+        if not need_more:
+            c = buf[start]
+
+            if c == '/' or c == '{' or c == '}':
+                nl = buf.find('\n', start)
+                need_more = nl == -1 and not eof
+
+                if not need_more:
+                    # comment lines are skipped, and so is the rest of a bracket line
+                    if c == '{':
+                        expect_bracket = False
+                    elif c == '}':
+                        if expect_bracket:
+                            error("vdf.parse: expected openning bracket", start)
+                        if depth == 0:
+                            error("vdf.parse: one too many closing parenthasis", start)
+                        depth -= 1
+
+                        if skip_depth < 0:
+                            yield (_TOKEN_BLOCK_END, None, None, base_offset + start)
+                        elif depth == skip_depth:
+                            skip_depth = -1
+            else:
+                if expect_bracket:
+                    error("vdf.parse: expected openning bracket", start)
+
+                match = _re_keyvalue.match(buf, start)
+
+                if match is None:
+                    if eof:
+                        error("vdf.parse: unexpected EOF (open key quote?)", start)
+                    need_more = True
+                else:
+                    qkey, key, qval, vq_end, val, sblock, eblock = match.group(*_keyvalue_groups)
+
+                    if qval is not None and vq_end is None:
+                        if eof:
+                            error("vdf.parse: unexpected EOF (open quote for value?)", start)
+                        need_more = True
+                    else:
+                        nl = buf.find('\n', match.end())
+                        need_more = nl == -1 and not eof
+
+                if not need_more:
+                    if qkey is not None:
+                        key = qkey
+
+                    if qval is None and val is not None:
+                        val = val.rstrip()
+                        if val == "":
+                            val = None
+                    else:
+                        val = qval
+
+                    if val is None:
+                        skip = skip_depth >= 0
+
+                        if not skip:
+                            skip = yield (_TOKEN_BLOCK_START, key, None, base_offset + start)
+
+                        if eblock is None:
+                            if skip and skip_depth < 0:
+                                skip_depth = depth
+                            depth += 1
+                            # only expect a bracket if it's not already on the same line
+                            if sblock is None:
+                                expect_bracket = True
+                        elif not skip:
+                            yield (_TOKEN_BLOCK_END, None, None, base_offset + start)
+                    elif skip_depth < 0:
+                        yield (_TOKEN_VALUE, key, val, base_offset + start)
+
+            if not need_more:
+                pos = len(buf) if nl == -1 else nl + 1
+                continue
+
+        if eof:
+            break
+
+        # keep the unconsumed tail and read more
+        base_lineno += buf.count('\n', 0, start)
+        base_offset += start
+        chunk = read(max(chunk_size, len(buf) - start))
+        buf = buf[start:] + chunk
+        pos = 0
+        eof = chunk == ''
+
+    if depth != 0:
+        error("vdf.parse: unclosed parenthasis or quotes (EOF)", len(buf))
+
+
+def _lex_regex(fp):
+    """
+    The original line based parser. Yields the same tokens as ``_lex()``
+    """
+    depth = 0
+    expect_bracket = False
+    offset = 0
+
     re_keyvalue = re.compile(r'^("(?P<qkey>(?:\\.|[^\\"])*)"|(?P<key>#?[a-z0-9\-\_\\\?$%<>]+))'
                              r'([ \t]*('
                              r'"(?P<qval>(?:\\.|[^\\"])*)(?P<vq_end>")?'
@@ -95,10 +504,13 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
                              flags=re.I)
 
     for lineno, line in enumerate(fp, 1):
+        offset += len(line)
+
         if lineno == 1:
             line = strip_bom(line)
 
         line = line.lstrip()
+        line_offset = offset - len(line)
 
         # skip empty and comment lines
         if line == "" or line[0] == '/':
@@ -115,8 +527,9 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
 
         # one level back
         if line[0] == "}":
-            if len(stack) > 1:
-                stack.pop()
+            if depth > 0:
+                depth -= 1
+                yield (_TOKEN_BLOCK_END, None, None, line_offset)
                 continue
 
             raise SyntaxError("vdf.parse: one too many closing parenthasis",
@@ -128,7 +541,9 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
 
             if not match:
                 try:
-                    line += next(fp)
+                    extra = next(fp)
+                    offset += len(extra)
+                    line += extra
                     continue
                 except StopIteration:
                     raise SyntaxError("vdf.parse: unexpected EOF (open key quote?)",
@@ -143,49 +558,41 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
                     if val == "":
                         val = None
 
-            if escaped:
-                key = _unescape(key)
-
-            # we have a key with value in parenthesis, so we make a new dict obj (level deeper)
+            # we have a key with value in parenthesis (level deeper)
             if val is None:
-                if merge_duplicate_keys and key in stack[-1]:
-                    _m = stack[-1][key]
-                    # we've descended a level deeper, if value is str, we have to overwrite it to mapper
-                    if not isinstance(_m, mapper):
-                        _m = stack[-1][key] = mapper()
-                else:
-                    _m = mapper()
-                    stack[-1][key] = _m
+                yield (_TOKEN_BLOCK_START, key, None, line_offset)
 
                 if match.group('eblock') is None:
                     # only expect a bracket if it's not already closed or on the same line
-                    stack.append(_m)
+                    depth += 1
                     if match.group('sblock') is None:
                         expect_bracket = True
+                else:
+                    yield (_TOKEN_BLOCK_END, None, None, line_offset)
 
-            # we've matched a simple keyvalue pair, map it to the last dict obj in the stack
+            # we've matched a simple keyvalue pair
             else:
                 # if the value is line consume one more line and try to match again,
                 # until we get the KeyValue pair
                 if match.group('vq_end') is None and match.group('qval') is not None:
                     try:
-                        line += next(fp)
+                        extra = next(fp)
+                        offset += len(extra)
+                        line += extra
                         continue
                     except StopIteration:
                         raise SyntaxError("vdf.parse: unexpected EOF (open quote for value?)",
                                           (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
 
-                stack[-1][key] = _unescape(val) if escaped else val
+                yield (_TOKEN_VALUE, key, val, line_offset)
 
             # exit the loop
             break
 
-    if len(stack) != 1:
+    if depth != 0:
         raise SyntaxError("vdf.parse: unclosed parenthasis or quotes (EOF)",
                            (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
 
-    return stack.pop()
-
 
 def loads(s, **kwargs):
     """
@@ -211,6 +618,8 @@ def load(fp, **kwargs):
     return parse(fp, **kwargs)
 
 
+_DUMP_CHUNK_LINES = 4096
+
 def dumps(obj, pretty=False, escaped=True):
     """
     Serialize ``obj`` to a VDF formatted ``str``.
@@ -239,31 +648,55 @@ def dump(obj, fp, pretty=False, escaped=True):
     if not isinstance(escaped, bool):
         raise TypeError("Expected escaped to be of type bool")
 
-    for chunk in _dump_gen(obj, pretty, escaped):
+    for chunk in _dump_gen(obj, pretty, escaped, _DUMP_CHUNK_LINES):
         fp.write(chunk)
 
 
-def _dump_gen(data, pretty=False, escaped=True, level=0):
+def _dump_gen(data, pretty=False, escaped=True, chunk_lines=None):
+    """
+    Walks ``data`` with an explicit stack and yields the output joined into chunks
+    of ``chunk_lines`` lines, or as a single chunk when that is ``None``.
+    """
     indent = "\t"
-    line_indent = ""
+    lines = []
+    # keys repeat a lot (path, label, apps...), so their escaped form is kept
+    escaped_keys = {}
+    stack = [iter(data.items())]
 
-    if pretty:
-        line_indent = indent * level
+    while stack:
+        line_indent = indent * (len(stack) - 1) if pretty else ""
 
-    for key, value in data.items():
-        if escaped and isinstance(key, string_type):
-            key = _escape(key)
+        for key, value in stack[-1]:
+            if escaped and isinstance(key, string_type):
+                try:
+                    key = escaped_keys[key]
+                except KeyError:
+                    key = escaped_keys[key] = _escape(key)
+
+            if isinstance(value, Mapping):
+                lines.append('%s"%s"\n%s{\n' % (line_indent, key, line_indent))
+                stack.append(iter(value.items()))
+                break
 
-        if isinstance(value, Mapping):
-            yield '%s"%s"\n%s{\n' % (line_indent, key, line_indent)
-            for chunk in _dump_gen(value, pretty, escaped, level+1):
-                yield chunk
-            yield "%s}\n" % line_indent
-        else:
             if escaped and isinstance(value, string_type):
                 value = _escape(value)
 
-            yield '%s"%s" "%s"\n' % (line_indent, key, value)
+            lines.append('%s"%s" "%s"\n' % (line_indent, key, value))
+
+            if chunk_lines is not None and len(lines) >= chunk_lines:
+                yield ''.join(lines)
+                del lines[:]
+        else:
+            stack.pop()
+            if stack:
+                lines.append("%s}\n" % (indent * (len(stack) - 1) if pretty else ""))
+
+        if chunk_lines is not None and len(lines) >= chunk_lines:
+            yield ''.join(lines)
+            del lines[:]
+
+    if lines:
+        yield ''.join(lines)
 
 
 # binary VDF
@@ -295,10 +728,123 @@ BIN_END         = b'\x08'
 BIN_INT64       = b'\x0A'
 BIN_END_ALT     = b'\x0B'
 
-def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=True):
+_BIN_VALUE_SIZES = {
+    BIN_INT32: 4,
+    BIN_FLOAT32: 4,
+    BIN_POINTER: 4,
+    BIN_COLOR: 4,
+    BIN_UINT64: 8,
+    BIN_INT64: 8,
+}
+
+_int32 = struct.Struct('<i')
+_uint32 = struct.Struct('<I')
+_uint64 = struct.Struct('<Q')
+_int64 = struct.Struct('<q')
+_float32 = struct.Struct('<f')
+
+# indexing bytes gives an int on Py3 and a str on Py2, BIN_*[0] matches either way
+_T_NONE = BIN_NONE[0]
+_T_STRING = BIN_STRING[0]
+_T_WIDESTRING = BIN_WIDESTRING[0]
+_T_END = BIN_END[0]
+_T_END_ALT = BIN_END_ALT[0]
+_T_VALUE_SIZES = dict((t[0], size) for t, size in _BIN_VALUE_SIZES.items())
+
+def _read_cstring(buf, pos):
+    end = buf.find(b'\x00', pos)
+
+    if end == -1:
+        raise SyntaxError("Unterminated cstring (offset: %d)" % pos)
+
+    return buf[pos:end].decode('utf-8', 'replace'), end + 1
+
+def _read_widestring(buf, pos):
+    end = buf.find(b'\x00\x00', pos)
+
+    if end == -1:
+        raise SyntaxError("Unterminated cstring (offset: %d)" % pos)
+
+    end += (end - pos) % 2
+
+    return buf[pos:end].decode('utf-16'), end + 2
+
+def _int_reader(unpack_from, size, wrapper=None):
+    if wrapper is None:
+        def read(buf, pos):
+            return unpack_from(buf, pos)[0], pos + size
+    else:
+        def read(buf, pos):
+            return wrapper(unpack_from(buf, pos)[0]), pos + size
+    return read
+
+def _binary_value_readers(plain_ints):
     """
-    Deserialize ``b`` (``bytes`` containing a VDF in "binary form")
-    to a Python object.
+    Returns a table of ``type byte -> reader(buf, pos)``, where the reader returns
+    the decoded value and the position after it
+    """
+    wrap = (lambda wrapper: None) if plain_ints else (lambda wrapper: wrapper)
+
+    readers = {
+        BIN_STRING: _read_cstring,
+        BIN_WIDESTRING: _read_widestring,
+        BIN_INT32: _int_reader(_int32.unpack_from, 4),
+        BIN_POINTER: _int_reader(_int32.unpack_from, 4, wrap(POINTER)),
+        BIN_COLOR: _int_reader(_int32.unpack_from, 4, wrap(COLOR)),
+        BIN_UINT64: _int_reader(_uint64.unpack_from, 8, wrap(UINT_64)),
+        BIN_INT64: _int_reader(_int64.unpack_from, 8, wrap(INT_64)),
+        BIN_FLOAT32: _int_reader(_float32.unpack_from, 4),
+    }
+
+    return dict((t[0], reader) for t, reader in readers.items())
+
+_BIN_READERS = _binary_value_readers(False)
+_BIN_PLAIN_INT_READERS = _binary_value_readers(True)
+
+def _as_buffer(b):
+    # the decoder needs slicing and find(), which memoryview doesn't have
+    if isinstance(b, memoryview):
+        obj = b.obj
+        if b.contiguous and hasattr(obj, 'find') and b.nbytes == len(obj):
+            return obj
+        return b.tobytes()
+    return b
+
+def _map_file(fp):
+    """
+    Returns ``(buf, pos, base, release)`` for the contents of ``fp``. Decoding
+    starts at ``buf[pos]`` and ``base + index`` is the position in ``fp`` for an
+    index into ``buf``. ``release`` is ``None`` or a function to call when done.
+
+    Real files are memory mapped, in-memory streams are used directly and
+    anything else is read in full.
+    """
+    offset = fp.tell()
+
+    try:
+        fileno = fp.fileno()
+    except (AttributeError, EnvironmentError, ValueError):
+        fileno = None
+
+    if fileno is not None:
+        try:
+            buf = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (EnvironmentError, ValueError):
+            # empty files can't be mapped
+            pass
+        else:
+            return buf, offset, 0, buf.close
+
+    if hasattr(fp, 'getvalue'):
+        return fp.getvalue(), offset, 0, None
+
+    return fp.read(), 0, offset, None
+
+def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=True,
+                 plain_ints=False, lazy=False):
+    """
+    Deserialize ``b`` (``bytes``, ``bytearray``, ``memoryview`` or ``mmap`` containing
+    a VDF in "binary form") to a Python object.
 
     ``mapper`` specifies the Python object used after deserializetion. ``dict` is
     used by default. Alternatively, ``collections.OrderedDict`` can be used if you
@@ -307,13 +853,24 @@ def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, ra
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``plain_ints`` when ``True`` decodes ``POINTER``, ``COLOR``, ``UINT_64`` and ``INT_64``
+    values as ``int``. The types are lost, so the result won't serialize back the same.
+
+    ``lazy`` when ``True`` returns a read-only ``BinaryVDFView`` instead, after a quick
+    structural pass over ``b``. Blocks and values are only decoded when accessed, and
+    ``mapper`` isn't used. ``b`` must not change while the view is in use.
     """
-    if not isinstance(b, bytes):
+    if not isinstance(b, (bytes, bytearray, memoryview, mmap.mmap)):
         raise TypeError("Expected s to be bytes, got %s" % type(b))
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
 
-    return binary_load(BytesIO(b), mapper, merge_duplicate_keys, alt_format, raise_on_remaining)
+    return _binary_decode(_as_buffer(b), 0, 0, mapper, merge_duplicate_keys, alt_format,
+                          raise_on_remaining, plain_ints, lazy)
 
-def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=False):
+def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=False,
+                plain_ints=False, lazy=False):
     """
     Deserialize ``fp`` (a ``.read()``-supporting file-like object containing
     binary VDF) to a Python object.
@@ -325,109 +882,336 @@ def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, ra
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``plain_ints`` and ``lazy`` are the same as for ``binary_loads()``. With ``lazy``,
+    the view keeps reading from the mapped file.
+
+    Real files are memory mapped, instead of being read piece by piece. Afterwards
+    ``fp`` is positioned right after the document.
     """
     if not hasattr(fp, 'read') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
         raise TypeError("Expected fp to be a file-like object with tell()/seek() and read() returning bytes")
     if not issubclass(mapper, Mapping):
         raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
 
-    # helpers
-    int32 = struct.Struct('<i')
-    uint64 = struct.Struct('<Q')
-    int64 = struct.Struct('<q')
-    float32 = struct.Struct('<f')
+    buf, pos, base, release = _map_file(fp)
+    cursor = [pos]
 
-    def read_string(fp, wide=False):
-        buf, end = b'', -1
-        offset = fp.tell()
+    try:
+        return _binary_decode(buf, pos, base, mapper, merge_duplicate_keys, alt_format,
+                              raise_on_remaining, plain_ints, lazy, cursor)
+    finally:
+        fp.seek(base + cursor[0])
+        if release is not None and not lazy:
+            release()
+
+def _binary_decode(buf, pos, base, mapper, merge_duplicate_keys, alt_format, raise_on_remaining,
+                   plain_ints, lazy, cursor=None):
+    cursor = cursor or [pos]
+
+    if lazy:
+        end_marker = _T_END if not alt_format else _T_END_ALT
+        index, cursor[0] = _index_binary_blocks(buf, pos, base, end_marker)
+        result = BinaryVDFView(buf, [pos], index, _BIN_PLAIN_INT_READERS if plain_ints else _BIN_READERS,
+                               end_marker, merge_duplicate_keys)
+    else:
+        result = _build_tree(_iter_binary_events(buf, pos, base, alt_format, plain_ints, cursor),
+                             mapper, merge_duplicate_keys)
+
+    if raise_on_remaining and cursor[0] < len(buf):
+        raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (base + cursor[0] - 1))
+
+    return result
+
+def binary_iterparse(fp, alt_format=False, plain_ints=False):
+    """
+    Incrementally parse ``fp`` (a ``.read()``-supporting file-like object containing
+    binary VDF) without building any Python objects for the document.
 
-        # locate string end
-        while end == -1:
-            chunk = fp.read(64)
+    Returns a generator of ``(event, key, value, depth, offset)`` tuples, the same
+    as ``iterparse()``. ``offset`` is the position of the item's type byte in ``fp``.
+    Once the generator is exhausted, ``fp`` is positioned right after the document.
 
-            if chunk == b'':
-                raise SyntaxError("Unterminated cstring (offset: %d)" % offset)
+    Sending a true value in response to a ``'start'`` event skips that block without
+    decoding it. No events are produced for its contents or its end.
+    """
+    if not hasattr(fp, 'read') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
+        raise TypeError("Expected fp to be a file-like object with tell()/seek() and read() returning bytes")
 
-            buf += chunk
-            end = buf.find(b'\x00\x00' if wide else b'\x00')
+    return _iter_binary_file_events(fp, alt_format, plain_ints)
 
-        if wide:
-            end += end % 2
+def _iter_binary_file_events(fp, alt_format, plain_ints):
+    buf, pos, base, release = _map_file(fp)
+    cursor = [pos]
+    events = _iter_binary_events(buf, pos, base, alt_format, plain_ints, cursor)
+    skip = None
 
-        # rewind fp
-        fp.seek(end - len(buf) + (2 if wide else 1), 1)
+    try:
+        while True:
+            try:
+                event = events.send(skip)
+            except StopIteration:
+                break
+            skip = yield event
+    finally:
+        events.close()
+        fp.seek(base + cursor[0])
+        if release is not None:
+            release()
+
+def _iter_binary_events(buf, pos, base, alt_format, plain_ints, cursor):
+    """
+    Decodes binary VDF from ``buf`` (``bytes``, ``bytearray`` or ``mmap``) starting at
+    ``pos``, and yields the events described in ``binary_iterparse()``. ``base`` is
+    added to the offsets. The position after the document is stored in ``cursor[0]``.
+    """
+    find = buf.find
+    size = len(buf)
+    readers = _BIN_PLAIN_INT_READERS if plain_ints else _BIN_READERS
+    end_marker = _T_END if not alt_format else _T_END_ALT
+    keys = []
+    depth = 0
 
-        # decode string
-        result = buf[:end]
+    try:
+        while pos < size:
+            offset = pos
+            t = buf[pos]
+            pos += 1
+
+            if t == end_marker:
+                if depth:
+                    depth -= 1
+                    yield ('end', keys.pop(), None, depth, base + offset)
+                    continue
+                break
+
+            end = find(b'\x00', pos)
+            if end == -1:
+                raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+            key = buf[pos:end].decode('utf-8', 'replace')
+            pos = end + 1
+
+            # strings are the most common values, so they skip the table
+            if t == _T_STRING:
+                end = find(b'\x00', pos)
+                if end == -1:
+                    raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+                val = buf[pos:end].decode('utf-8', 'replace')
+                pos = end + 1
+            elif t == _T_NONE:
+                if (yield ('start', key, None, depth, base + offset)):
+                    pos = _skip_binary_block(buf, pos, base, end_marker)
+                else:
+                    keys.append(key)
+                    depth += 1
+                continue
+            else:
+                reader = readers.get(t)
+                if reader is None:
+                    raise SyntaxError("Unknown data type at offset %d: %s" % (base + pos - 1, repr(buf[offset:offset+1])))
 
-        if wide:
-            result = result.decode('utf-16')
-        elif bytes is not str:
-            result = result.decode('utf-8', 'replace')
-        else:
-            try:
-                result.decode('ascii')
-            except:
-                result = result.decode('utf-8', 'replace')
+                val, pos = reader(buf, pos)
 
-        return result
+            yield ('value', key, val, depth, base + offset)
+    finally:
+        cursor[0] = pos
 
-    stack = [mapper()]
-    CURRENT_BIN_END = BIN_END if not alt_format else BIN_END_ALT
+    if depth:
+        raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
 
-    for t in iter(lambda: fp.read(1), b''):
-        if t == CURRENT_BIN_END:
-            if len(stack) > 1:
-                stack.pop()
-                continue
-            break
+def _skip_binary_block(buf, pos, base, end_marker):
+    # returns the position after the end of the block, without decoding anything
+    find = buf.find
+    size = len(buf)
+    depth = 1
 
-        key = read_string(fp)
+    while depth:
+        if pos >= size:
+            raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
 
-        if t == BIN_NONE:
-            if merge_duplicate_keys and key in stack[-1]:
-                _m = stack[-1][key]
-            else:
-                _m = mapper()
-                stack[-1][key] = _m
-            stack.append(_m)
-        elif t == BIN_STRING:
-            stack[-1][key] = read_string(fp)
-        elif t == BIN_WIDESTRING:
-            stack[-1][key] = read_string(fp, wide=True)
-        elif t in (BIN_INT32, BIN_POINTER, BIN_COLOR):
-            val = int32.unpack(fp.read(int32.size))[0]
-
-            if t == BIN_POINTER:
-                val = POINTER(val)
-            elif t == BIN_COLOR:
-                val = COLOR(val)
+        t = buf[pos]
+        pos += 1
 
-            stack[-1][key] = val
-        elif t == BIN_UINT64:
-            stack[-1][key] = UINT_64(uint64.unpack(fp.read(int64.size))[0])
-        elif t == BIN_INT64:
-            stack[-1][key] = INT_64(int64.unpack(fp.read(int64.size))[0])
-        elif t == BIN_FLOAT32:
-            stack[-1][key] = float32.unpack(fp.read(float32.size))[0]
+        if t == end_marker:
+            depth -= 1
+            continue
+
+        end = find(b'\x00', pos)
+        if end == -1:
+            raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+        pos = end + 1
+
+        if t == _T_NONE:
+            depth += 1
         else:
-            raise SyntaxError("Unknown data type at offset %d: %s" % (fp.tell() - 1, repr(t)))
+            pos = _skip_binary_value(buf, pos, base, t)
+
+    return pos
+
+def _skip_binary_value(buf, pos, base, t):
+    # returns the position after a value of type ``t`` starting at ``pos``
+    if t == _T_STRING:
+        end = buf.find(b'\x00', pos)
+        if end == -1:
+            raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+        return end + 1
+    elif t == _T_WIDESTRING:
+        end = buf.find(b'\x00\x00', pos)
+        if end == -1:
+            raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+        return end + (end - pos) % 2 + 2
+    elif t in _T_VALUE_SIZES:
+        pos += _T_VALUE_SIZES[t]
+        if pos > len(buf):
+            raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
+        return pos
+    else:
+        raise SyntaxError("Unknown data type at offset %d: %s" % (base + pos - 1, repr(buf[pos-1:pos])))
+
+def _index_binary_blocks(buf, pos, base, end_marker):
+    """
+    Structural pass over the document at ``pos``, without decoding anything.
+    Returns ``(index, end)``, where ``index`` maps the start of each nested block's
+    contents to the position after its end marker, and ``end`` is the position
+    after the document.
+    """
+    find = buf.find
+    size = len(buf)
+    index = {}
+    starts = []
+
+    while pos < size:
+        t = buf[pos]
+        pos += 1
+
+        if t == end_marker:
+            if not starts:
+                break
+            index[starts.pop()] = pos
+            continue
+
+        end = find(b'\x00', pos)
+        if end == -1:
+            raise SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+        pos = end + 1
 
-    if len(stack) != 1:
+        if t == _T_NONE:
+            starts.append(pos)
+        else:
+            pos = _skip_binary_value(buf, pos, base, t)
+
+    if starts:
         raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
-    if raise_on_remaining and fp.read(1) != b'':
-        fp.seek(-1, 1)
-        raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (fp.tell() - 1))
 
-    return stack.pop()
+    return index, pos
+
+class BinaryVDFView(Mapping):
+    """
+    Read-only view of a block in binary VDF, returned by ``binary_loads()`` and
+    ``binary_load()`` with ``lazy=True``.
+
+    The keys of a block are decoded the first time the view is used. Values and
+    nested blocks are decoded when they are looked up, and then cached. Nested
+    blocks are views as well.
+    """
+    __slots__ = ('_buf', '_starts', '_index', '_readers', '_end_marker', '_merge', '_entries', '_cache')
+
+    def __init__(self, buf, starts, index, readers, end_marker, merge_duplicate_keys):
+        self._buf = buf
+        self._starts = starts
+        self._index = index
+        self._readers = readers
+        self._end_marker = end_marker
+        self._merge = merge_duplicate_keys
+        self._entries = None
+        self._cache = {}
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, repr(list(self.keys())))
+
+    def _load_entries(self):
+        # key -> (type, value position), or (None, [block starts]) for blocks
+        entries = {}
+        buf = self._buf
+        find = buf.find
+        size = len(buf)
+        end_marker = self._end_marker
+
+        for pos in self._starts:
+            while pos < size:
+                t = buf[pos]
+
+                if t == end_marker:
+                    break
+
+                end = find(b'\x00', pos + 1)
+                key = buf[pos+1:end].decode('utf-8', 'replace')
+                pos = end + 1
+
+                if t == _T_NONE:
+                    entry = entries.get(key)
+                    if self._merge and entry is not None and entry[0] is None:
+                        entry[1].append(pos)
+                    else:
+                        entries[key] = (None, [pos])
+                    pos = self._index[pos]
+                else:
+                    entries[key] = (t, pos)
+                    pos = _skip_binary_value(buf, pos, 0, t)
+
+        self._entries = entries
+        return entries
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        t, where = (self._entries or self._load_entries())[key]
+
+        if t is None:
+            value = BinaryVDFView(self._buf, where, self._index, self._readers, self._end_marker, self._merge)
+        else:
+            value = self._readers[t](self._buf, where)[0]
+
+        self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._entries or self._load_entries())
+
+    def __len__(self):
+        return len(self._entries or self._load_entries())
+
+    def __contains__(self, key):
+        return key in (self._entries or self._load_entries())
+
+def binary_select(fp, pattern, mapper=dict, merge_duplicate_keys=True, alt_format=False, plain_ints=False):
+    """
+    Return a list with the values at ``pattern`` in ``fp`` (a ``.read()``-supporting
+    file-like object containing binary VDF), in document order.
+
+    ``pattern`` is the same as for ``select()``. Blocks that can't match are skipped
+    without decoding their strings and values. ``plain_ints`` is the same as for
+    ``binary_loads()``
+    """
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+
+    return _select(binary_iterparse(fp, alt_format, plain_ints), _compile_selector(pattern), mapper,
+                   merge_duplicate_keys, None)
+
+_BINARY_DUMP_CHUNK_SIZE = 65536
 
 def binary_dumps(obj, alt_format=False):
     """
     Serialize ``obj`` to a binary VDF formatted ``bytes``.
     """
-    buf = BytesIO()
-    binary_dump(obj, buf, alt_format)
-    return buf.getvalue()
+    if not isinstance(obj, Mapping):
+        raise TypeError("Expected obj to be type of Mapping")
+
+    return b''.join(_binary_dump_gen(obj, alt_format=alt_format))
 
 def binary_dump(obj, fp, alt_format=False):
     """
@@ -438,60 +1222,94 @@ def binary_dump(obj, fp, alt_format=False):
     if not hasattr(fp, 'write'):
         raise TypeError("Expected fp to have write() method")
 
-    for chunk in _binary_dump_gen(obj, alt_format=alt_format):
+    for chunk in _binary_dump_gen(obj, alt_format=alt_format, chunk_size=_BINARY_DUMP_CHUNK_SIZE):
         fp.write(chunk)
 
-def _binary_dump_gen(obj, level=0, alt_format=False):
-    if level == 0 and len(obj) == 0:
+def _binary_dump_gen(obj, alt_format=False, chunk_size=None):
+    """
+    Encodes ``obj`` into a single ``bytearray``, walking the tree with an explicit
+    stack. When ``chunk_size`` is set, the buffer is yielded as ``bytes`` every time
+    it grows past it, otherwise it is yielded once at the end.
+    """
+    if len(obj) == 0:
         return
 
-    int32 = struct.Struct('<i')
-    uint64 = struct.Struct('<Q')
-    int64 = struct.Struct('<q')
-    float32 = struct.Struct('<f')
+    buf = bytearray()
+    end = BIN_END if not alt_format else BIN_END_ALT
+    stack = [iter(obj.items())]
 
-    for key, value in obj.items():
-        if isinstance(key, string_type):
-            key = key.encode('utf-8')
-        else:
-            raise TypeError("dict keys must be of type str, got %s" % type(key))
-
-        if isinstance(value, Mapping):
-            yield BIN_NONE + key + BIN_NONE
-            for chunk in _binary_dump_gen(value, level+1, alt_format=alt_format):
-                yield chunk
-        elif isinstance(value, UINT_64):
-            yield BIN_UINT64 + key + BIN_NONE + uint64.pack(value)
-        elif isinstance(value, INT_64):
-            yield BIN_INT64 + key + BIN_NONE + int64.pack(value)
-        elif isinstance(value, string_type):
-            try:
-                value = value.encode('utf-8') + BIN_NONE
-                yield BIN_STRING
-            except:
-                value = value.encode('utf-16') + BIN_NONE*2
-                yield BIN_WIDESTRING
-            yield key + BIN_NONE + value
-        elif isinstance(value, float):
-            yield BIN_FLOAT32 + key + BIN_NONE + float32.pack(value)
-        elif isinstance(value, (COLOR, POINTER, int, int_type)):
-            if isinstance(value, COLOR):
-                yield BIN_COLOR
-            elif isinstance(value, POINTER):
-                yield BIN_POINTER
+    while stack:
+        for key, value in stack[-1]:
+            if isinstance(key, string_type):
+                key = key.encode('utf-8')
+            else:
+                raise TypeError("dict keys must be of type str, got %s" % type(key))
+
+            if isinstance(value, Mapping):
+                buf += BIN_NONE
+                buf += key
+                buf += BIN_NONE
+                stack.append(iter(value.items()))
+                break
+            elif isinstance(value, UINT_64):
+                buf += BIN_UINT64
+                buf += key
+                buf += BIN_NONE
+                buf += _uint64.pack(value)
+            elif isinstance(value, INT_64):
+                buf += BIN_INT64
+                buf += key
+                buf += BIN_NONE
+                buf += _int64.pack(value)
+            elif isinstance(value, string_type):
+                try:
+                    value = value.encode('utf-8')
+                    buf += BIN_STRING
+                    buf += key
+                    buf += BIN_NONE
+                    buf += value
+                    buf += BIN_NONE
+                except UnicodeError:
+                    buf += BIN_WIDESTRING
+                    buf += key
+                    buf += BIN_NONE
+                    buf += value.encode('utf-16')
+                    buf += BIN_NONE * 2
+            elif isinstance(value, float):
+                buf += BIN_FLOAT32
+                buf += key
+                buf += BIN_NONE
+                buf += _float32.pack(value)
+            elif isinstance(value, (COLOR, POINTER, int, int_type)):
+                if isinstance(value, COLOR):
+                    buf += BIN_COLOR
+                elif isinstance(value, POINTER):
+                    buf += BIN_POINTER
+                else:
+                    buf += BIN_INT32
+                buf += key
+                buf += BIN_NONE
+                buf += _int32.pack(value)
             else:
-                yield BIN_INT32
-            yield key + BIN_NONE
-            yield int32.pack(value)
+                raise TypeError("Unsupported type: %s" % type(value))
         else:
-            raise TypeError("Unsupported type: %s" % type(value))
+            stack.pop()
+            buf += end
 
-    yield BIN_END if not alt_format else BIN_END_ALT
+        if chunk_size is not None and len(buf) >= chunk_size:
+            yield bytes(buf)
+            del buf[:]
 
+    if buf:
+        yield bytes(buf)
+
+
+_VBKV_VERIFY_CHUNK_SIZE = 1048576
 
 def vbkv_loads(s, mapper=dict, merge_duplicate_keys=True):
     """
-    Deserialize ``s`` (``bytes`` containing a VBKV to a Python object.
+    Deserialize ``s`` (``bytes``, ``bytearray``, ``memoryview`` or ``mmap`` containing
+    a VBKV) to a Python object.
 
     ``mapper`` specifies the Python object used after deserializetion. ``dict` is
     used by default. Alternatively, ``collections.OrderedDict`` can be used if you
@@ -500,22 +1318,131 @@ def vbkv_loads(s, mapper=dict, merge_duplicate_keys=True):
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    The payload is checksummed and decoded in place, without being copied.
+    """
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+
+    return _vbkv_decode(_as_buffer(s), 0, mapper, merge_duplicate_keys)
+
+def vbkv_load(fp, mapper=dict, merge_duplicate_keys=True):
     """
-    if s[:4] != b'VBKV':
+    Deserialize ``fp`` (a ``.read()``-supporting file-like object containing
+    a VBKV) to a Python object.
+
+    ``mapper`` and ``merge_duplicate_keys`` are the same as for ``vbkv_loads()``
+
+    Real files are memory mapped, and the checksum is computed over the mapping
+    before decoding from it. Afterwards ``fp`` is positioned at the end.
+    """
+    if not hasattr(fp, 'read') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
+        raise TypeError("Expected fp to be a file-like object with tell()/seek() and read() returning bytes")
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+
+    buf, pos, base, release = _map_file(fp)
+
+    try:
+        return _vbkv_decode(buf, pos, mapper, merge_duplicate_keys)
+    finally:
+        fp.seek(base + len(buf))
+        if release is not None:
+            release()
+
+def vbkv_verify(s):
+    """
+    Returns ``True`` if ``s`` has a VBKV header and a payload matching its checksum,
+    without decoding anything.
+
+    ``s`` can be ``bytes``-like, or a ``.read()``-supporting file-like object. Files
+    are checksummed in chunks from the current position, and rewound afterwards.
+    """
+    if not hasattr(s, 'read'):
+        buf = _as_buffer(s)
+        return buf[:4] == b'VBKV' and len(buf) >= 8 and _uint32.unpack_from(buf, 4)[0] == _crc32_from(buf, 8)
+
+    start = s.tell()
+
+    try:
+        header = s.read(8)
+        if header[:4] != b'VBKV' or len(header) != 8:
+            return False
+
+        checksum = 0
+        chunk = bytearray(_VBKV_VERIFY_CHUNK_SIZE)
+        view = memoryview(chunk)
+
+        try:
+            while True:
+                if hasattr(s, 'readinto'):
+                    n = s.readinto(chunk)
+                    if not n:
+                        break
+                    checksum = crc32(view[:n], checksum)
+                else:
+                    data = s.read(_VBKV_VERIFY_CHUNK_SIZE)
+                    if not data:
+                        break
+                    checksum = crc32(data, checksum)
+        finally:
+            view.release()
+
+        return _uint32.unpack_from(header, 4)[0] == checksum & 0xffffffff
+    finally:
+        s.seek(start)
+
+def _vbkv_decode(buf, pos, mapper, merge_duplicate_keys):
+    if buf[pos:pos+4] != b'VBKV':
         raise ValueError("Invalid header")
 
-    checksum, = struct.unpack('<i', s[4:8])
+    checksum, = _uint32.unpack_from(buf, pos + 4)
 
-    if checksum != crc32(s[8:]):
+    if checksum != _crc32_from(buf, pos + 8):
         raise ValueError("Invalid checksum")
 
-    return binary_loads(s[8:], mapper, merge_duplicate_keys, alt_format=True)
+    # offsets in errors are relative to the payload
+    return _binary_decode(buf, pos + 8, -(pos + 8), mapper, merge_duplicate_keys, True, True, False, False)
+
+def _crc32_from(buf, pos):
+    # unsigned crc32 of buf[pos:], without copying it
+    with memoryview(buf)[pos:] as view:
+        return crc32(view) & 0xffffffff
 
 def vbkv_dumps(obj):
     """
     Serialize ``obj`` to a VBKV formatted ``bytes``.
     """
-    data =  b''.join(_binary_dump_gen(obj, alt_format=True))
-    checksum = crc32(data)
+    if not isinstance(obj, Mapping):
+        raise TypeError("Expected obj to be type of Mapping")
+
+    data = b''.join(_binary_dump_gen(obj, alt_format=True))
+    checksum = crc32(data) & 0xffffffff
+
+    return b'VBKV' + _uint32.pack(checksum) + data
+
+def vbkv_dump(obj, fp):
+    """
+    Serialize ``obj`` as VBKV and write it to ``fp`` (a seekable file-like object
+    opened for binary writing).
+
+    The payload is streamed in chunks while the checksum is updated, and then the
+    header is filled in, so the whole payload is never held in memory.
+    """
+    if not isinstance(obj, Mapping):
+        raise TypeError("Expected obj to be type of Mapping")
+    if not hasattr(fp, 'write') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
+        raise TypeError("Expected fp to be a file-like object with tell()/seek() and write()")
+
+    start = fp.tell()
+    fp.write(b'VBKV' + _uint32.pack(0))
+
+    checksum = 0
+    for chunk in _binary_dump_gen(obj, alt_format=True, chunk_size=_BINARY_DUMP_CHUNK_SIZE):
+        checksum = crc32(chunk, checksum)
+        fp.write(chunk)
 
-    return b'VBKV' + struct.pack('<i', checksum) + data
+    end = fp.tell()
+    fp.seek(start + 4)
+    fp.write(_uint32.pack(checksum & 0xffffffff))
+    fp.seek(end)
@@ -1,9 +1,7 @@
 import sys
-from collections import Counter
 
 if sys.version_info[0] >= 3:
     _iter_values = 'values'
-    _range = range
     _string_type = str
     import collections.abc as _c
     class _kView(_c.KeysView):
@@ -17,14 +15,125 @@ if sys.version_info[0] >= 3:
             return self._mapping.iteritems()
 else:
     _iter_values = 'itervalues'
-    _range = xrange
     _string_type = basestring
     _kView = lambda x: list(x.iterkeys())
     _vView = lambda x: list(x.itervalues())
     _iView = lambda x: list(x.iteritems())
 
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+def _verify_key_tuple(key):
+    if len(key) != 2:
+        raise ValueError("Expected key tuple length to be 2, got %d" % len(key))
+    if not isinstance(key[0], int):
+        raise TypeError("Key index should be an int")
+    if not isinstance(key[1], _string_type):
+        raise TypeError("Key value should be a str")
+
+
+def _normalize_key(key):
+    if isinstance(key, _string_type):
+        key = (0, key)
+    elif isinstance(key, tuple):
+        _verify_key_tuple(key)
+    else:
+        raise TypeError("Expected key to be a str or tuple, got %s" % type(key))
+    return key
+
+
+def _index_keys(keys):
+    # maps each key to the positions of its duplicates, skipping holes
+    index = {}
+    for pos, key in enumerate(keys):
+        if key is not None:
+            positions = index.get(key)
+            if positions is None:
+                index[key] = [pos]
+            else:
+                positions.append(pos)
+    return index
+
+
+class _Duplicates(object):
+    """
+    The positions of the duplicates of a key, once one of them was deleted. A deleted
+    one stays as None, and a Fenwick tree counting the ones left finds the n-th of
+    them in O(log n), so deleting never shifts the others. The list is rebuilt when
+    most of it is deleted.
+    """
+    __slots__ = ('positions', 'tree', 'live')
+
+    def __init__(self, positions):
+        self.positions = list(positions)
+        self.live = len(self.positions)
+        # every position is there, so each node counts the whole range it covers
+        self.tree = [0] + [i & -i for i in range(1, self.live + 1)]
+
+    def __len__(self):
+        return self.live
+
+    def __iter__(self):
+        return (pos for pos in self.positions if pos is not None)
+
+    def _prefix(self, i):
+        # number of duplicates left among the first i
+        tree = self.tree
+        total = 0
+        while i:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    def _find(self, idx):
+        # place in positions of the idx-th duplicate left
+        if not 0 <= idx < self.live:
+            raise IndexError(idx)
+        tree = self.tree
+        size = len(tree) - 1
+        found = 0
+        step = 1 << size.bit_length() - 1
+        while step:
+            if found + step <= size and tree[found + step] <= idx:
+                found += step
+                idx -= tree[found]
+            step >>= 1
+        return found
+
+    def __getitem__(self, idx):
+        return self.positions[self._find(idx)]
+
+    def append(self, pos):
+        self.positions.append(pos)
+        i = len(self.positions)
+        self.tree.append(1 + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+        self.live += 1
+
+    def pop(self, idx):
+        place = self._find(idx)
+        pos = self.positions[place]
+        self.positions[place] = None
+        self.live -= 1
+
+        tree = self.tree
+        i = place + 1
+        while i < len(tree):
+            tree[i] -= 1
+            i += i & -i
+
+        if self.live * 2 < len(self.positions):
+            self.__init__(list(self))
+        return pos
+
 
 class VDFDict(dict):
+    # deleted entries leave a hole in the arrays, until there are this many holes
+    # and they are more than half of the entries
+    _COMPACT_MIN = 32
+
     def __init__(self, data=None):
         """
         This is a dictionary that supports duplicate keys and preserves insert order
@@ -37,93 +146,154 @@ class VDFDict(dict):
 
         When the ``key`` is ``str``, instead of tuple, set will create a duplicate and get will look up ``(0, key)``
         """
-        self.__omap = []
-        self.__kcount = Counter()
+        # entries are kept in insertion order in two parallel lists. A deleted entry
+        # becomes a hole (None key), so nothing needs to be shifted or renumbered.
+        # __kidx maps each key to the positions of its duplicates, in order, so the
+        # duplicate index of an entry is its place in that list. A key whose duplicates
+        # were deleted from anywhere but the end gets a _Duplicates instead, so later
+        # ones don't have to move down. It is built on first use when the lists come
+        # from _from_arrays(). __shared is set while the lists
+        # are also used by a FrozenVDFDict, and they are copied before any change.
+        self.__keys = []
+        self.__values = []
+        self.__kidx = {}
+        self.__holes = 0
+        self.__shared = False
 
         if data is not None:
             if not isinstance(data, (list, dict)):
                 raise ValueError("Expected data to be list of pairs or dict, got %s" % type(data))
             self.update(data)
 
+    @classmethod
+    def _from_arrays(cls, keys, values, shared=False):
+        """
+        Returns a new instance using the ``keys`` and ``values`` lists as is, without
+        copying them. Keys must all be str. With ``shared``, the lists are copied
+        before the first change.
+        """
+        self = cls.__new__(cls)
+        self.__keys = keys
+        self.__values = values
+        self.__kidx = None
+        self.__holes = 0
+        self.__shared = shared
+        return self
+
     def __repr__(self):
         out = "%s(" % self.__class__.__name__
         out += "%s)" % repr(list(self.iteritems()))
         return out
 
-    def __len__(self):
-        return len(self.__omap)
-
-    def _verify_key_tuple(self, key):
-        if len(key) != 2:
-            raise ValueError("Expected key tuple length to be 2, got %d" % len(key))
-        if not isinstance(key[0], int):
-            raise TypeError("Key index should be an int")
-        if not isinstance(key[1], _string_type):
-            raise TypeError("Key value should be a str")
+    def __reduce__(self):
+        return self.__class__, (list(self.iteritems()),)
 
-    def _normalize_key(self, key):
-        if isinstance(key, _string_type):
-            key = (0, key)
-        elif isinstance(key, tuple):
-            self._verify_key_tuple(key)
-        else:
-            raise TypeError("Expected key to be a str or tuple, got %s" % type(key))
-        return key
+    def __len__(self):
+        return len(self.__keys) - self.__holes
+
+    _verify_key_tuple = staticmethod(_verify_key_tuple)
+    _normalize_key = staticmethod(_normalize_key)
+
+    def _key_index(self):
+        if self.__kidx is None:
+            self.__kidx = _index_keys(self.__keys)
+        return self.__kidx
+
+    def _own(self):
+        if self.__shared:
+            self.__keys = list(self.__keys)
+            self.__values = list(self.__values)
+            self.__shared = False
+
+    def _position(self, key):
+        # position of the entry for a normalized key in the arrays
+        idx, skey = key
+        positions = self._key_index().get(skey)
+        if positions is None or not 0 <= idx < len(positions):
+            raise KeyError(key)
+        return positions[idx]
 
     def __setitem__(self, key, value):
+        self._own()
+
         if isinstance(key, _string_type):
-            key = (self.__kcount[key], key)
-            self.__omap.append(key)
+            kidx = self._key_index()
+            positions = kidx.get(key)
+            if positions is None:
+                positions = kidx[key] = []
+            positions.append(len(self.__keys))
+            self.__keys.append(key)
+            self.__values.append(value)
         elif isinstance(key, tuple):
             self._verify_key_tuple(key)
-            if key not in self:
+            try:
+                pos = self._position(key)
+            except KeyError:
                 raise KeyError("%s doesn't exist" % repr(key))
+            self.__values[pos] = value
         else:
             raise TypeError("Expected either a str or tuple for key")
-        super(VDFDict, self).__setitem__(key, value)
-        self.__kcount[key[1]] += 1
 
     def __getitem__(self, key):
-        return super(VDFDict, self).__getitem__(self._normalize_key(key))
+        return self.__values[self._position(self._normalize_key(key))]
 
     def __delitem__(self, key):
-        key = self._normalize_key(key)
-        result = super(VDFDict, self).__delitem__(key)
-
-        start_idx = self.__omap.index(key)
-        del self.__omap[start_idx]
-
-        dup_idx, skey = key
-        self.__kcount[skey] -= 1
-        tail_count = self.__kcount[skey] - dup_idx
-
-        if tail_count > 0:
-            for idx in _range(start_idx, len(self.__omap)):
-                if self.__omap[idx][1] == skey:
-                    oldkey = self.__omap[idx]
-                    newkey = (dup_idx, skey)
-                    super(VDFDict, self).__setitem__(newkey, self[oldkey])
-                    super(VDFDict, self).__delitem__(oldkey)
-                    self.__omap[idx] = newkey
-
-                    dup_idx += 1
-                    tail_count -= 1
-                    if tail_count == 0:
-                        break
-
-        if self.__kcount[skey] == 0:
-            del self.__kcount[skey]
-
-        return result
+        idx, skey = self._normalize_key(key)
+        kidx = self._key_index()
+        positions = kidx.get(skey)
+        if positions is None or not 0 <= idx < len(positions):
+            raise KeyError((idx, skey))
+
+        self._own()
+
+        # later duplicates move down one index just by being later in the list
+        if isinstance(positions, _Duplicates):
+            pos = positions.pop(idx)
+        elif idx == len(positions) - 1:
+            pos = positions.pop()
+        else:
+            positions = kidx[skey] = _Duplicates(positions)
+            pos = positions.pop(idx)
+        if not positions:
+            del kidx[skey]
+
+        self.__keys[pos] = None
+        self.__values[pos] = None
+        self.__holes += 1
+        self._compact()
+
+    def _compact(self, force=False):
+        keys, values = self.__keys, self.__values
+
+        # drop trailing holes, so the last entry is always at the end
+        while keys and keys[-1] is None:
+            keys.pop()
+            values.pop()
+            self.__holes -= 1
+
+        if not self.__holes:
+            return
+        if not force and (self.__holes < self._COMPACT_MIN or self.__holes * 2 < len(keys)):
+            return
+
+        self.__keys = []
+        self.__values = []
+        self.__kidx = {}
+        self.__holes = 0
+
+        for key, value in zip(keys, values):
+            if key is not None:
+                self.__setitem__(key, value)
 
     def __iter__(self):
         return iter(self.iterkeys())
 
     def __contains__(self, key):
-        return super(VDFDict, self).__contains__(self._normalize_key(key))
+        idx, skey = self._normalize_key(key)
+        return 0 <= idx < len(self._key_index().get(skey, ()))
 
     def __eq__(self, other):
-        if isinstance(other, VDFDict):
+        if isinstance(other, (VDFDict, FrozenVDFDict)):
             return list(self.items()) == list(other.items())
         else:
             return False
@@ -132,12 +302,19 @@ class VDFDict(dict):
         return not self.__eq__(other)
 
     def clear(self):
-        super(VDFDict, self).clear()
-        self.__kcount.clear()
-        self.__omap = list()
+        self.__keys = []
+        self.__values = []
+        self.__kidx = {}
+        self.__holes = 0
+        self.__shared = False
 
     def get(self, key, *args):
-        return super(VDFDict, self).get(self._normalize_key(key), *args)
+        try:
+            return self.__getitem__(key)
+        except KeyError:
+            if args:
+                return args[0]
+            return None
 
     def setdefault(self, key, default=None):
         if key not in self:
@@ -151,10 +328,11 @@ class VDFDict(dict):
         return value
 
     def popitem(self):
-        if not self.__omap:
+        if not self.__keys:
             raise KeyError("VDFDict is empty")
-        key = self.__omap[-1]
-        return key[1], self.pop(key)
+        skey = self.__keys[-1]
+        key = (len(self._key_index()[skey]) - 1, skey)
+        return skey, self.pop(key)
 
     def update(self, data=None, **kwargs):
         if isinstance(data, dict):
@@ -166,19 +344,23 @@ class VDFDict(dict):
             self.__setitem__(key, value)
 
     def iterkeys(self):
-        return (key[1] for key in self.__omap)
+        return (key for key in self.__keys if key is not None)
 
     def keys(self):
         return _kView(self)
 
     def itervalues(self):
-        return (self[key] for key in self.__omap)
+        if not self.__holes:
+            return iter(self.__values)
+        return (value for key, value in zip(self.__keys, self.__values) if key is not None)
 
     def values(self):
         return _vView(self)
 
     def iteritems(self):
-        return ((key[1], self[key]) for key in self.__omap)
+        if not self.__holes:
+            return zip(self.__keys, self.__values)
+        return ((key, value) for key, value in zip(self.__keys, self.__values) if key is not None)
 
     def items(self):
         return _iView(self)
@@ -187,35 +369,183 @@ class VDFDict(dict):
         """ Returns all values of the given key """
         if not isinstance(key, _string_type):
             raise TypeError("Key needs to be a string.")
-        return [self[(idx, key)] for idx in _range(self.__kcount[key])]
+        values = self.__values
+        return [values[pos] for pos in self._key_index().get(key, ())]
 
     def remove_all_for(self, key):
         """ Removes all items with the given key """
         if not isinstance(key, _string_type):
             raise TypeError("Key need to be a string.")
 
-        for idx in _range(self.__kcount[key]):
-            super(VDFDict, self).__delitem__((idx, key))
+        positions = self._key_index().pop(key, ())
+        if positions:
+            self._own()
 
-        self.__omap = list(filter(lambda x: x[1] != key, self.__omap))
+        for pos in positions:
+            self.__keys[pos] = None
+            self.__values[pos] = None
+            self.__holes += 1
 
-        del self.__kcount[key]
+        self._compact()
 
     def has_duplicates(self):
         """
         Returns ``True`` if the dict contains keys with duplicates.
         Recurses through any all keys with value that is ``VDFDict``.
         """
-        for n in getattr(self.__kcount, _iter_values)():
-            if n != 1:
+        for positions in getattr(self._key_index(), _iter_values)():
+            if len(positions) != 1:
                 return True
 
-        def dict_recurse(obj):
-            for v in getattr(obj, _iter_values)():
-                if isinstance(v, VDFDict) and v.has_duplicates():
-                    return True
-                elif isinstance(v, dict):
-                    return dict_recurse(v)
+        return _has_nested_duplicates(self)
+
+    def freeze(self):
+        """
+        Returns a read-only ``FrozenVDFDict`` with the same items. The two share their
+        storage until this dict is changed. Nested values are not frozen.
+        """
+        self._compact(force=True)
+        self.__shared = True
+        return FrozenVDFDict._from_arrays(self.__keys, self.__values)
+
+
+class FrozenVDFDict(Mapping):
+    """
+    A read-only ``VDFDict``, which keeps the keys and values in two lists and uses far
+    less memory. The key index is built on the first lookup, so iterating over a
+    parsed ``FrozenVDFDict`` never builds it.
+
+    Keys, ``(index, key)`` tuples and duplicates work the same as with ``VDFDict``.
+    Use ``thaw()`` to get a ``VDFDict`` that can be changed.
+    """
+    __slots__ = ('_keys', '_values', '_index')
+
+    def __init__(self, data=None):
+        keys = []
+        values = []
+
+        if data is not None:
+            if isinstance(data, Mapping):
+                data = data.items()
+            elif not isinstance(data, list):
+                raise ValueError("Expected data to be list of pairs or dict, got %s" % type(data))
+
+            for key, value in data:
+                if not isinstance(key, _string_type):
+                    raise TypeError("Expected key to be a str, got %s" % type(key))
+                keys.append(key)
+                values.append(value)
+
+        self._keys = keys
+        self._values = values
+        self._index = None
+
+    @classmethod
+    def _from_arrays(cls, keys, values):
+        """
+        Returns a new instance using the ``keys`` and ``values`` lists as is, without
+        copying them. Keys must all be str.
+        """
+        self = cls.__new__(cls)
+        self._keys = keys
+        self._values = values
+        self._index = None
+        return self
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, repr(list(self.iteritems())))
+
+    def __reduce__(self):
+        return self.__class__, (list(self.iteritems()),)
+
+    _normalize_key = staticmethod(_normalize_key)
+
+    def _key_index(self):
+        if self._index is None:
+            self._index = _index_keys(self._keys)
+        return self._index
+
+    def __getitem__(self, key):
+        idx, skey = self._normalize_key(key)
+        positions = self._key_index().get(skey)
+        if positions is None or not 0 <= idx < len(positions):
+            raise KeyError((idx, skey))
+        return self._values[positions[idx]]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        idx, skey = self._normalize_key(key)
+        return 0 <= idx < len(self._key_index().get(skey, ()))
+
+    def __eq__(self, other):
+        if isinstance(other, (VDFDict, FrozenVDFDict)):
+            return list(self.iteritems()) == list(other.items())
+        else:
             return False
 
-        return dict_recurse(self)
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self.__getitem__(key)
+        except KeyError:
+            return default
+
+    def iterkeys(self):
+        return iter(self._keys)
+
+    def keys(self):
+        return _kView(self)
+
+    def itervalues(self):
+        return iter(self._values)
+
+    def values(self):
+        return _vView(self)
+
+    def iteritems(self):
+        return zip(self._keys, self._values)
+
+    def items(self):
+        return _iView(self)
+
+    def get_all_for(self, key):
+        """ Returns all values of the given key """
+        if not isinstance(key, _string_type):
+            raise TypeError("Key needs to be a string.")
+        values = self._values
+        return [values[pos] for pos in self._key_index().get(key, ())]
+
+    def has_duplicates(self):
+        """
+        Returns ``True`` if the dict contains keys with duplicates.
+        Recurses through any all keys with value that is ``VDFDict`` or ``FrozenVDFDict``.
+        """
+        if len(self._key_index()) != len(self._keys):
+            return True
+
+        return _has_nested_duplicates(self)
+
+    def thaw(self):
+        """
+        Returns a ``VDFDict`` with the same items. The two share their storage until
+        the ``VDFDict`` is changed. Nested values are not thawed.
+        """
+        return VDFDict._from_arrays(self._keys, self._values, shared=True)
+
+
+def _has_nested_duplicates(obj):
+    for v in getattr(obj, _iter_values)():
+        if isinstance(v, (VDFDict, FrozenVDFDict)) and v.has_duplicates():
+            return True
+        elif isinstance(v, dict):
+            return _has_nested_duplicates(v)
+    return False